@@ -0,0 +1,72 @@
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from typing import Any, Optional
+
+from benchmarks.environment import generate_wordlist, load_wordlist, prepare
+
+
+def get_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    from benchmarks.suite import BENCHMARKS, Context
+    from on9wordchainbot.words import default_dictionary
+
+    wordlist = load_wordlist(args.wordlist) if args.wordlist else generate_wordlist(args.words, args.seed)
+    default_dictionary.build(wordlist)
+    ctx = Context(wordlist, args.seed, args.iterations, args.db_uri)
+
+    results: list[dict[str, Any]] = []
+    for name, f in BENCHMARKS.items():
+        if args.only and not any(s in name for s in args.only):
+            continue
+        print(f"Running {name}...", file=sys.stderr)
+        results.extend(r.to_dict() for r in await f(ctx))
+
+    return {
+        "meta": {
+            "commit": get_commit(),
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "wordlist": args.wordlist or f"generated ({args.words} words, seed {args.seed})",
+            "dictionary_size": default_dictionary.count,
+            "iterations": args.iterations
+        },
+        "results": results
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run On9 Word Chain Bot benchmarks offline.")
+    parser.add_argument("--words", type=int, default=300_000, help="size of generated word list")
+    parser.add_argument("--wordlist", help="use a word list file (one word per line) instead")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--only", nargs="*", help="run benchmarks whose names contain any of these")
+    parser.add_argument("--db-uri", help="PostgreSQL database for the update_db benchmark (skipped if not given)")
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    prepare()
+    output = json.dumps(asyncio.run(run(args)), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import json
+import logging
+import os
+import random
+import tempfile
+
+# Configuration with well-formed but fake tokens.
+# No requests reach Telegram since bot sessions are replaced with stubs.
+FAKE_CONFIG = {
+    "TOKEN": "100000001:benchmark-token",
+    "ON9BOT_TOKEN": "100000002:benchmark-token",
+    "DB_URI": "",
+    "PROVIDER_TOKEN": "",
+    "OWNER_ID": 1,
+    "ADMIN_GROUP_ID": -1,
+    "OFFICIAL_GROUP_ID": -1,
+    "WORD_ADDITION_CHANNEL_ID": -1,
+    "VIP": [],
+    "VIP_GROUP": [],
+    "METRICS_PORT": None
+}
+
+# Relative frequencies of letters in English text
+LETTER_FREQUENCIES = {
+    "a": 8.2, "b": 1.5, "c": 2.8, "d": 4.3, "e": 12.7, "f": 2.2, "g": 2.0, "h": 6.1, "i": 7.0,
+    "j": 0.15, "k": 0.77, "l": 4.0, "m": 2.4, "n": 6.7, "o": 7.5, "p": 1.9, "q": 0.095, "r": 6.0,
+    "s": 6.3, "t": 9.1, "u": 2.8, "v": 0.98, "w": 2.4, "x": 0.15, "y": 2.0, "z": 0.074
+}
+
+
+def prepare() -> None:
+    # Import on9wordchainbot with the fake configuration and stubbed bot sessions.
+    # Must be called before importing anything else from on9wordchainbot.
+    from benchmarks.stubs import StubSession
+
+    logging.disable(logging.WARNING)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as d:
+        with open(os.path.join(d, "config.json"), "w") as f:
+            json.dump(FAKE_CONFIG, f)
+        os.chdir(d)  # on9wordchainbot.constants reads config.json from the working directory
+        try:
+            import on9wordchainbot.constants  # noqa: F401
+        finally:
+            os.chdir(cwd)
+
+    from on9wordchainbot.resources import bot, on9bot
+
+    bot.session = StubSession()
+    on9bot.session = StubSession()
+
+
+def generate_wordlist(size: int, seed: int) -> list[str]:
+    # Deterministic list of fake words with English letter frequencies and word lengths
+    rng = random.Random(seed)
+    letters = list(LETTER_FREQUENCIES)
+    weights = list(LETTER_FREQUENCIES.values())
+    words: set[str] = set()
+    while len(words) < size:
+        length = min(max(round(rng.gauss(9, 3)), 1), 25)
+        words.add("".join(rng.choices(letters, weights, k=length)))
+    return sorted(words)
+
+
+def load_wordlist(path: str) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
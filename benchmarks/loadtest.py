@@ -0,0 +1,355 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional
+
+from benchmarks.environment import FAKE_CONFIG, generate_wordlist, load_wordlist, prepare
+from benchmarks.stubs import RecordedCall, StubPool, StubSession
+
+CHATTER = ["lol", "gg", "nice", "bruh", "ok", "wait what", "Hmm", "/stats"]
+
+
+@dataclass
+class Stats:
+    updates: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    timeouts: int = 0
+    games_started: int = 0
+    games_finished: int = 0
+    max_running_games: int = 0
+    update_latencies: list[float] = field(default_factory=list)  # Time to process any update
+    answer_latencies: list[float] = field(default_factory=list)  # Time to process an answer
+    turn_latencies: list[float] = field(default_factory=list)  # Valid answer sent -> next turn message
+    errors: list[str] = field(default_factory=list)
+
+
+def summarize(values: list[float]) -> Optional[dict[str, float]]:
+    if not values:
+        return None
+    values = sorted(values)
+
+    def percentile(p: float) -> float:
+        return values[min(int(len(values) * p), len(values) - 1)]
+
+    return {
+        "count": len(values),
+        "mean": statistics.fmean(values),
+        "p50": percentile(0.5),
+        "p90": percentile(0.9),
+        "p99": percentile(0.99),
+        "max": values[-1]
+    }
+
+
+def get_rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # Peak RSS in KB on Linux
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace, wordlist: list[str]) -> None:
+        # Imported after the environment is prepared
+        from on9wordchainbot import dp
+        from on9wordchainbot.resources import bot, on9bot
+
+        self.dp = dp
+        self.bot = bot
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.stats = Stats()
+        self.stopping = False
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1)
+        self.owner = self.make_user(FAKE_CONFIG["OWNER_ID"], "Owner")  # type: ignore[arg-type]
+
+        self.words_by_letter: dict[str, list[str]] = defaultdict(list)
+        for w in wordlist:
+            w = w.lower()
+            if w.isalpha():
+                self.words_by_letter[w[0]].append(w)
+
+        # Woken up when a turn message is sent in the group
+        self.turn_events: dict[int, asyncio.Event] = defaultdict(asyncio.Event)
+        self.last_answer_time: dict[int, float] = {}
+        self.peak_traced = 0
+
+        self.session = StubSession(tuple(args.latency), args.retry_after_rate)
+        self.session.on_call = self.on_call
+        bot.session = self.session
+        on9bot.session = StubSession(tuple(args.latency))
+
+    @staticmethod
+    def make_user(user_id: int, name: str) -> Any:
+        from aiogram import types
+
+        return types.User(id=user_id, is_bot=False, first_name=name)
+
+    def on_call(self, call: RecordedCall) -> None:
+        if call.chat_id is None or call.method != "SendMessage":
+            return
+        if call.text and call.text.startswith("Turn: "):
+            answer_time = self.last_answer_time.pop(call.chat_id, None)
+            if answer_time is not None:
+                self.stats.turn_latencies.append(call.end - answer_time)
+        self.turn_events[call.chat_id].set()
+
+    async def feed(self, group_id: int, user: Any, text: str) -> float:
+        from aiogram import types
+
+        update = types.Update(
+            update_id=next(self.update_ids),
+            message=types.Message(
+                message_id=next(self.message_ids),
+                date=datetime.now(),
+                chat=types.Chat(id=group_id, type="supergroup", title=f"Group {group_id}"),
+                from_user=user,
+                text=text
+            )
+        )
+        t = time.perf_counter()
+        try:
+            await self.dp.feed_update(self.bot, update)
+        except Exception as e:
+            self.stats.errors.append(f"{e.__class__.__name__}: {e}")
+        latency = time.perf_counter() - t
+        self.stats.updates += 1
+        self.stats.update_latencies.append(latency)
+        return latency
+
+    async def feed_later(self, delay: float, group_id: int, user: Any, text: str) -> None:
+        await asyncio.sleep(delay)
+        await self.feed(group_id, user, text)
+
+    def valid_answer(self, game: Any) -> Optional[str]:
+        # Cheap answer picking so that the harness does not compete with the bot for CPU time
+        from on9wordchainbot.models import EliminationGame
+
+        words = self.words_by_letter.get(game.current_word[-1], [])
+        min_len = 1 if isinstance(game, EliminationGame) else game.min_letters_limit
+        banned_letters = getattr(game, "banned_letters", None) or []
+        required_letter = getattr(game, "required_letter", None)
+        for _ in range(50):
+            if not words:
+                break
+            w = self.rng.choice(words)
+            if (
+                len(w) >= min_len
+                and w not in game.used_words
+                and (not required_letter or required_letter in w)
+                and not any(c in w for c in banned_letters)
+            ):
+                return w
+        return game.get_random_valid_answer()
+
+    def invalid_answer(self, game: Any) -> str:
+        return game.current_word[-1] + "".join(self.rng.choices("qxzj", k=self.rng.randint(3, 8)))
+
+    async def simulate_group(self, index: int) -> None:
+        from on9wordchainbot.constants import GameState
+        from on9wordchainbot.resources import GlobalState
+
+        group_id = -1_000_000 - index
+        command = self.args.modes[index % len(self.args.modes)]
+        users = [self.make_user(10_000 + index * 1000 + i, f"Player {i}") for i in range(self.args.players)]
+        users_by_id = {u.id: u for u in users}
+
+        await asyncio.sleep(self.rng.uniform(0, self.args.ramp_up))
+        await self.feed(group_id, users[0], f"/{command}")
+        game = GlobalState.games.get(group_id)
+        if game is None:
+            return
+
+        # Join burst
+        await asyncio.gather(
+            *(self.feed_later(self.rng.uniform(0, self.args.join_burst), group_id, u, "/join") for u in users[1:])
+        )
+        if self.rng.random() < self.args.vp_rate:
+            await self.feed(group_id, users[0], "/addvp")
+        await self.feed(group_id, self.owner, "/forcestart")
+        self.stats.games_started += 1
+
+        event = self.turn_events[group_id]
+        while not self.stopping:
+            try:
+                await asyncio.wait_for(event.wait(), 1)
+            except asyncio.TimeoutError:
+                pass
+            event.clear()
+            if GlobalState.games.get(group_id) is not game:
+                self.stats.games_finished += 1
+                return
+            await asyncio.sleep(0)  # Let the game set per-turn attributes after sending the turn message
+            if game.state != GameState.RUNNING or not game.accepting_answers or game.answered:
+                continue
+
+            player = game.players_in_game[0]
+            for _ in range(self.rng.randint(0, 2)):
+                asyncio.create_task(
+                    self.feed_later(self.rng.uniform(0, 3), group_id, self.rng.choice(users), self.rng.choice(CHATTER))
+                )
+            if player.is_vp:
+                continue
+            if self.rng.random() < self.args.timeout_rate:
+                self.stats.timeouts += 1
+                continue
+
+            await asyncio.sleep(self.rng.uniform(*self.args.think_time))
+            if self.rng.random() < self.args.invalid_rate:
+                await self.feed(group_id, users_by_id[player.user_id], self.invalid_answer(game).capitalize())
+                self.stats.rejected += 1
+
+            word = self.valid_answer(game)
+            if word is None or not game.accepting_answers or game.players_in_game[0] is not player:
+                continue  # Ran out of time or no answers left
+            t = time.perf_counter()
+            self.last_answer_time[group_id] = t
+            self.stats.answer_latencies.append(
+                await self.feed(group_id, users_by_id[player.user_id], word.capitalize())
+            )
+            if game.answered:
+                self.stats.accepted += 1
+            else:
+                self.last_answer_time.pop(group_id, None)
+                self.stats.rejected += 1
+
+    async def monitor(self) -> None:
+        from on9wordchainbot.constants import GameState
+        from on9wordchainbot.resources import GlobalState
+
+        while True:
+            await asyncio.sleep(1)
+            running = sum(1 for g in GlobalState.games.values() if g.state == GameState.RUNNING)
+            self.stats.max_running_games = max(self.stats.max_running_games, running)
+            if self.args.trace_memory:
+                current, _ = tracemalloc.get_traced_memory()
+                self.peak_traced = max(self.peak_traced, current)
+
+    async def run(self) -> dict[str, Any]:
+        from on9wordchainbot import resources
+        from on9wordchainbot.constants import GameState
+        from on9wordchainbot.metrics import GAME_TICK_LAG
+        from on9wordchainbot.resources import GlobalState
+
+        loop = asyncio.get_running_loop()
+        loop.set_exception_handler(
+            lambda _, context: self.stats.errors.append(str(context.get("exception") or context["message"]))
+        )
+        resources.pool = StubPool()  # type: ignore[assignment]
+        random.seed(self.args.seed)
+
+        rss_before = get_rss_kb()
+        if self.args.trace_memory:
+            tracemalloc.start()
+        traced_before = tracemalloc.get_traced_memory()[0] if self.args.trace_memory else 0
+
+        monitor_task = asyncio.create_task(self.monitor())
+        group_tasks = [asyncio.create_task(self.simulate_group(i)) for i in range(self.args.groups)]
+        start = time.perf_counter()
+        await asyncio.wait(group_tasks, timeout=self.args.duration)
+        elapsed = time.perf_counter() - start
+
+        # Stop simulation and games
+        self.stopping = True
+        monitor_task.cancel()
+        for game in list(GlobalState.games.values()):
+            game.state = GameState.KILLGAME
+        await asyncio.sleep(2)
+        for task in group_tasks:
+            task.cancel()
+
+        tick_lag: dict[str, Any] = {}
+        for label_values, (counts, total) in GAME_TICK_LAG.values.items():
+            n = sum(counts)
+            cumulative = 0
+            p99_bound: Optional[float] = None
+            for le, count in zip(GAME_TICK_LAG.buckets, counts):
+                cumulative += count
+                if cumulative >= n * 0.99:
+                    p99_bound = le
+                    break
+            tick_lag[label_values[0]] = {"ticks": n, "mean": total[0] / n if n else None, "p99_upper_bound": p99_bound}
+
+        stats = self.stats
+        games = max(stats.max_running_games, 1)
+        memory: dict[str, Any] = {"peak_rss_increase_kb": get_rss_kb() - rss_before}
+        memory["peak_rss_increase_per_game_kb"] = memory["peak_rss_increase_kb"] / games
+        if self.args.trace_memory:
+            memory["traced_per_game_kb"] = (self.peak_traced - traced_before) / 1024 / games
+            tracemalloc.stop()
+
+        return {
+            "config": {k: v for k, v in vars(self.args).items() if k != "output"},
+            "elapsed_s": elapsed,
+            "throughput": {
+                "updates_per_s": stats.updates / elapsed,
+                "accepted_answers_per_s": stats.accepted / elapsed,
+                "api_calls_per_s": len(self.session.calls) / elapsed
+            },
+            "games": {
+                "started": stats.games_started,
+                "finished": stats.games_finished,
+                "max_running": stats.max_running_games
+            },
+            "answers": {"accepted": stats.accepted, "rejected": stats.rejected, "timeouts": stats.timeouts},
+            "latency_s": {
+                "update": summarize(stats.update_latencies),
+                "answer": summarize(stats.answer_latencies),
+                "turn": summarize(stats.turn_latencies)
+            },
+            "tick_lag_s": tick_lag,
+            "memory": memory,
+            "retry_after": self.session.retry_after_count,
+            "errors": {"count": len(stats.errors), "samples": stats.errors[:10]}
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Simulate many concurrent groups against the real dispatcher with a fake Telegram API."
+    )
+    parser.add_argument("--groups", type=int, default=100)
+    parser.add_argument("--players", type=int, default=8, help="players per group")
+    parser.add_argument("--duration", type=float, default=120, help="seconds to run for")
+    parser.add_argument("--ramp-up", type=float, default=10, help="seconds over which groups start games")
+    parser.add_argument("--join-burst", type=float, default=3, help="seconds over which players join")
+    parser.add_argument("--modes", nargs="+", default=["startclassic", "startchaos", "startbl", "startrl", "startelim"])
+    parser.add_argument("--vp-rate", type=float, default=0.2, help="fraction of groups adding a virtual player")
+    parser.add_argument("--think-time", type=float, nargs=2, default=[1, 6], help="min and max seconds per answer")
+    parser.add_argument("--invalid-rate", type=float, default=0.2, help="chance of an invalid answer before a valid one")
+    parser.add_argument("--timeout-rate", type=float, default=0.03, help="chance of a player not answering")
+    parser.add_argument("--latency", type=float, nargs=2, default=[0.05, 0.25], help="simulated API latency range")
+    parser.add_argument("--retry-after-rate", type=float, default=0, help="chance of an API call hitting flood control")
+    parser.add_argument("--trace-memory", action="store_true", help="measure allocations with tracemalloc (slow)")
+    parser.add_argument("--words", type=int, default=300_000, help="size of generated word list")
+    parser.add_argument("--wordlist", help="use a word list file (one word per line) instead")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    prepare()
+    from on9wordchainbot.words import default_dictionary
+
+    wordlist = load_wordlist(args.wordlist) if args.wordlist else generate_wordlist(args.words, args.seed)
+    default_dictionary.build(wordlist)
+
+    print(f"Simulating {args.groups} groups x {args.players} players for {args.duration}s...", file=sys.stderr)
+    output = json.dumps(asyncio.run(LoadTest(args, wordlist).run()), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Optional
+
+from aiogram import Bot, methods, types
+from aiogram.client.session.base import BaseSession
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods.base import TelegramMethod, TelegramType
+
+
+@dataclass
+class RecordedCall:
+    method: str
+    chat_id: Optional[int]
+    text: Optional[str]
+    start: float
+    end: float
+
+
+class StubSession(BaseSession):
+    # Offline replacement for the aiohttp session of a Bot.
+    # Answers API calls with minimal valid objects, records every call
+    # and optionally simulates network latency and flood control.
+
+    def __init__(
+        self,
+        latency: tuple[float, float] = (0, 0),
+        retry_after_rate: float = 0,
+        retry_after: int = 1
+    ) -> None:
+        super().__init__()
+        self.latency = latency
+        self.retry_after_rate = retry_after_rate
+        self.retry_after = retry_after
+        self.calls: list[RecordedCall] = []
+        self.on_call: Optional[Callable[[RecordedCall], None]] = None
+        self.retry_after_count = 0
+        self.message_id = 0
+
+    async def close(self) -> None:
+        pass
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: Optional[dict[str, Any]] = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True
+    ) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[TelegramType], timeout: Optional[int] = None
+    ) -> TelegramType:
+        start = time.perf_counter()
+        if self.latency[1]:
+            await asyncio.sleep(random.uniform(*self.latency))
+        chat_id = getattr(method, "chat_id", None)
+        call = RecordedCall(
+            type(method).__name__,
+            chat_id if isinstance(chat_id, int) else None,
+            getattr(method, "text", None),
+            start,
+            time.perf_counter()
+        )
+        self.calls.append(call)
+        if self.on_call:
+            self.on_call(call)
+
+        if self.retry_after_rate and random.random() < self.retry_after_rate:
+            self.retry_after_count += 1
+            raise TelegramRetryAfter(method=method, message="Flood control exceeded", retry_after=self.retry_after)
+        return self.build_result(bot, method)
+
+    def build_result(self, bot: Bot, method: TelegramMethod[Any]) -> Any:
+        if isinstance(method, methods.GetMe):
+            return types.User(id=bot.id, is_bot=True, first_name="Bot", username=f"bot{bot.id}")
+        if isinstance(method, methods.GetChat):
+            return types.ChatFullInfo(
+                id=int(method.chat_id),
+                type="supergroup",
+                title="Group",
+                accent_color_id=0,
+                max_reaction_count=11,
+                accepted_gift_types=types.AcceptedGiftTypes(
+                    unlimited_gifts=False, limited_gifts=False, unique_gifts=False, premium_subscription=False
+                )
+            ).as_(bot)
+        if isinstance(method, methods.GetChatMember):
+            return types.ChatMemberMember(
+                user=types.User(id=method.user_id, is_bot=False, first_name="User")
+            )
+        if isinstance(method, (methods.SendMessage, methods.EditMessageText)):
+            self.message_id += 1
+            return types.Message(
+                message_id=self.message_id,
+                date=datetime.now(),
+                chat=types.Chat(id=int(method.chat_id or 0), type="supergroup"),
+                from_user=types.User(id=bot.id, is_bot=True, first_name="Bot"),
+                text=method.text
+            ).as_(bot)
+        return True
+
+
+class StubConnection:
+    # Offline replacement for an asyncpg connection which records queries and returns no rows
+
+    def __init__(self, pool: "StubPool") -> None:
+        self.pool = pool
+
+    async def execute(self, query: str, *args: Any) -> str:
+        self.pool.queries.append(query)
+        return ""
+
+    async def fetch(self, query: str, *args: Any) -> list[Any]:
+        self.pool.queries.append(query)
+        return []
+
+    async def fetchrow(self, query: str, *args: Any) -> None:
+        self.pool.queries.append(query)
+        return None
+
+    async def fetchval(self, query: str, *args: Any) -> None:
+        self.pool.queries.append(query)
+        return None
+
+    async def copy_records_to_table(self, table_name: str, **kwargs: Any) -> str:
+        self.pool.queries.append(f"COPY {table_name}")
+        return ""
+
+
+class StubPool:
+    def __init__(self) -> None:
+        self.queries: list[str] = []
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[StubConnection]:
+        yield StubConnection(self)
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,623 @@
+import asyncio
+import os
+import random
+import re
+import statistics
+import time
+import tracemalloc
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+from uuid import uuid4
+
+from aiogram import types
+
+from on9wordchainbot.constants import INLINE_PAGE_SIZE, GameSettings, GameState
+from on9wordchainbot.handlers.gameplay import answer_handler
+from on9wordchainbot.handlers.misc import get_inline_page, inline_pages
+from on9wordchainbot.models import BannedLettersGame, ChaosGame, ClassicGame, EliminationGame, Player, RequiredLetterGame
+from on9wordchainbot.models.vp_strategy import DIFFICULTIES, choose_vp_answer
+from on9wordchainbot.ranks import Ranking, sort_scores
+from on9wordchainbot.resources import GlobalState, bot
+from on9wordchainbot.utils import check_word_existence, filter_words, get_random_word, get_suggestion_text, is_word
+from on9wordchainbot.words import HAS_NUMPY, WordSet, default_dictionary
+
+INIT_SQL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "init.sql")
+
+
+@dataclass
+class Context:
+    wordlist: list[str]
+    seed: int
+    iterations: int
+    db_uri: Optional[str] = None
+    rng: random.Random = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.rng = random.Random(self.seed)
+
+
+@dataclass
+class Result:
+    name: str
+    times: list[float]
+    ops_per_iteration: int = 1  # Operations performed per timed iteration
+    memory: Optional[dict[str, int]] = None  # Bytes measured with tracemalloc
+
+    def to_dict(self) -> dict[str, Any]:
+        times = sorted(self.times)
+        mean = statistics.fmean(times)
+        return {
+            "name": self.name,
+            "iterations": len(times),
+            "ops_per_iteration": self.ops_per_iteration,
+            "mean_s": mean,
+            "median_s": statistics.median(times),
+            "p95_s": times[min(int(len(times) * 0.95), len(times) - 1)],
+            "min_s": times[0],
+            "max_s": times[-1],
+            "ops_per_s": self.ops_per_iteration / mean if mean else None,
+            **({"memory": self.memory} if self.memory else {})
+        }
+
+
+Benchmark = Callable[[Context], Awaitable[list[Result]]]
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(name: str) -> Callable[[Benchmark], Benchmark]:
+    def decorator(f: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = f
+        return f
+
+    return decorator
+
+
+def measure(name: str, f: Callable[[], Any], iterations: int, ops_per_iteration: int = 1) -> Result:
+    f()  # Warm up
+    times = []
+    for _ in range(iterations):
+        t = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - t)
+    return Result(name, times, ops_per_iteration)
+
+
+def trace_peak(f: Callable[[], Any]) -> int:
+    # Peak bytes allocated while calling f, i.e. the transient allocations of a call
+    tracemalloc.start()
+    try:
+        f()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def make_message(user: types.User, text: str) -> types.Message:
+    return types.Message(
+        message_id=1,
+        date=datetime.now(),
+        chat=types.Chat(id=-100, type="supergroup"),
+        from_user=user,
+        text=text
+    ).as_(bot)
+
+
+def make_players(n: int) -> list[Player]:
+    return [Player(types.User(id=i, is_bot=False, first_name=f"Player {i}")) for i in range(1, n + 1)]
+
+
+@benchmark("words_build")
+async def bench_words_build(ctx: Context) -> list[Result]:
+    result = measure("words_build", lambda: default_dictionary.build(ctx.wordlist), max(ctx.iterations // 10, 3))
+    result.memory = {"peak_bytes": trace_peak(lambda: default_dictionary.build(ctx.wordlist))}
+    return [result]
+
+
+@benchmark("check_word_existence")
+async def bench_check_word_existence(ctx: Context) -> list[Result]:
+    # Half hits, half misses
+    hits = ctx.rng.sample(ctx.wordlist, 5000)
+    misses = [w + "zq" for w in ctx.rng.sample(ctx.wordlist, 5000)]
+    queries = hits + misses
+    ctx.rng.shuffle(queries)
+
+    def run() -> None:
+        for w in queries:
+            check_word_existence(w)
+
+    return [measure("check_word_existence", run, ctx.iterations, len(queries))]
+
+
+@benchmark("split_words")
+async def bench_split_words(ctx: Context) -> list[Result]:
+    # Hundreds of words pasted into /addwords, a few of them new or repeated
+    words = ctx.rng.sample(ctx.wordlist, 500) + [w + "zq" for w in ctx.rng.sample(ctx.wordlist, 50)]
+    words += ctx.rng.sample(words, 50)
+    ctx.rng.shuffle(words)
+
+    def run_reference() -> None:
+        # Loop of /addwords before batch checking
+        words_to_add = list(set(words))
+        for w in words_to_add[:]:
+            if check_word_existence(w):
+                words_to_add.remove(w)
+
+    return [
+        measure("split_words", lambda: default_dictionary.split_words(words), ctx.iterations, len(words)),
+        measure("split_words[reference]", run_reference, ctx.iterations, len(words))
+    ]
+
+
+@benchmark("suggest")
+async def bench_suggest(ctx: Context) -> list[Result]:
+    # Misspellings of words by one or two random edits, as answered in games and checked with /exists
+    def misspell(w: str) -> str:
+        i = ctx.rng.randrange(len(w))
+        c = ctx.rng.choice("abcdefghijklmnopqrstuvwxyz")
+        return ctx.rng.choice((w[:i] + c + w[i + 1:], w[:i] + w[i + 1:], w[:i] + c + w[i:]))
+
+    results = []
+    for distance in (1, 2):
+        words = ctx.rng.sample(ctx.wordlist, 50 if distance == 1 else 10)  # Farther words take much longer
+        misspellings = []
+        for w in words:
+            for _ in range(distance):
+                w = misspell(w)
+            misspellings.append(w)
+
+        def run() -> None:
+            for w in misspellings:
+                get_suggestion_text(w, max_distance=distance)
+
+        results.append(measure(f"suggest[{distance}_edit]", run, max(ctx.iterations // 10, 3), len(misspellings)))
+    return results
+
+
+def reference_filter_words(
+    min_len: int = 1,
+    prefix: Optional[str] = None,
+    required_letter: Optional[str] = None,
+    banned_letters: Optional[list[str]] = None,
+    exclude_words: Optional[set[str]] = None
+) -> list[str]:
+    # String predicates over DAWG keys, as filter_words worked before letter masks, for comparison
+    words: list[str] = default_dictionary.dawg.keys(prefix) if prefix else default_dictionary.dawg.keys()
+    if min_len > 1:
+        words = [w for w in words if len(w) >= min_len]
+    if required_letter:
+        words = [w for w in words if required_letter in w]
+    if banned_letters:
+        words = [w for w in words if all(i not in w for i in banned_letters)]
+    if exclude_words:
+        words = [w for w in words if w not in exclude_words]
+    return words
+
+
+@benchmark("filter_words")
+async def bench_filter_words(ctx: Context) -> list[Result]:
+    # Constraint combinations used by the game modes, with each filtering engine
+    used_words = WordSet(default_dictionary, ctx.rng.sample(ctx.wordlist, 200))  # Used words of a long game
+    banned_letters = ["a", "k", "s"]
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    cases: dict[str, Callable[[str], dict[str, Any]]] = {
+        "start_word": lambda c: {"min_len": 3},
+        "start_word_banned_letters": lambda c: {"min_len": 3, "banned_letters": banned_letters},
+        "classic": lambda c: {"min_len": 6, "prefix": c, "exclude_words": used_words},
+        "hard_mode": lambda c: {"min_len": 10, "prefix": c, "exclude_words": used_words},
+        "banned_letters": lambda c: {
+            "min_len": 5, "prefix": c, "banned_letters": banned_letters, "exclude_words": used_words
+        },
+        "required_letter": lambda c: {
+            "min_len": 5, "prefix": c, "required_letter": "e" if c != "e" else "t", "exclude_words": used_words
+        },
+        "elimination": lambda c: {"prefix": c, "exclude_words": used_words},
+        "chosen_first_letter_start": lambda c: {"prefix": c}
+    }
+    engines = (["numpy"] if HAS_NUMPY else []) + ["python", "reference"]
+
+    results = []
+    for case, kwargs_of in cases.items():
+        prefixed = "prefix" in kwargs_of("a")
+        queries = [kwargs_of(c) for c in (letters if prefixed else "a")]
+        reference_queries = [
+            {**kwargs, "exclude_words": set(kwargs["exclude_words"])} if "exclude_words" in kwargs else kwargs
+            for kwargs in queries
+        ]
+
+        def run_filter_words() -> None:
+            for kwargs in queries:
+                filter_words(**kwargs)
+
+        def run_get_random_word() -> None:
+            for kwargs in queries:
+                get_random_word(**kwargs)
+
+        def run_reference_filter_words() -> None:
+            for kwargs in reference_queries:
+                reference_filter_words(**kwargs)
+
+        def run_reference_get_random_word() -> None:
+            for kwargs in reference_queries:
+                words = reference_filter_words(**kwargs)
+                random.choice(words) if words else None
+
+        # Unprefixed queries scan the whole dictionary
+        iterations = ctx.iterations if prefixed else max(ctx.iterations // 5, 3)
+        for engine in engines:
+            default_dictionary.use_numpy = engine == "numpy"
+            if engine == "reference":
+                filter_words_f, get_random_word_f = run_reference_filter_words, run_reference_get_random_word
+            else:
+                filter_words_f, get_random_word_f = run_filter_words, run_get_random_word
+            results.append(measure(f"filter_words[{case},{engine}]", filter_words_f, iterations, len(queries)))
+            results.append(
+                measure(f"get_random_word[{case},{engine}]", get_random_word_f, iterations, len(queries))
+            )
+    default_dictionary.use_numpy = HAS_NUMPY
+    return results
+
+
+@benchmark("count_words")
+async def bench_count_words(ctx: Context) -> list[Result]:
+    # Checks done by the game modes when choosing letters, against counting with filter_words
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    required_letter_queries = [(c, 6, r, None) for c in letters for r in letters if r != c]
+    banned_letters_queries = [(c, 6, None, ["a", "k", "s"]) for c in letters]
+
+    results = []
+    for case, queries in (("required_letter", required_letter_queries), ("banned_letters", banned_letters_queries)):
+        def run_count_words() -> None:
+            for query in queries:
+                default_dictionary.count_words(*query)
+
+        def run_filter_words() -> None:
+            for c, min_len, required_letter, banned_letters in queries:
+                len(filter_words(min_len, c, required_letter, banned_letters))
+
+        results.append(measure(f"count_words[{case}]", run_count_words, ctx.iterations, len(queries)))
+        results.append(measure(f"count_words[{case},filter_words]", run_filter_words, ctx.iterations, len(queries)))
+    return results
+
+
+@benchmark("handle_answer")
+async def bench_handle_answer(ctx: Context) -> list[Result]:
+    # ClassicGame.handle_answer (including post_turn_processing and post turn message) with a stubbed bot
+    def new_game() -> ClassicGame:
+        game = ClassicGame(-100)
+        game.players = make_players(10)
+        game.players_in_game = game.players[:]
+        game.state = GameState.RUNNING
+        game.current_word = "start"
+        game.used_words.add(game.current_word)
+        return game
+
+    # Play a game first to find a chain of valid answers
+    random.seed(ctx.seed)
+    game = new_game()
+    chain = []
+    for _ in range(300):
+        word = game.get_random_valid_answer()
+        if not word:
+            break
+        chain.append(word)
+        game.post_turn_processing(word)
+        await game.send_post_turn_message(word)
+        game.players_in_game.append(game.players_in_game.pop(0))
+
+    times = []
+    game = new_game()
+    for word in chain:
+        message = make_message(types.User(id=1, is_bot=False, first_name="Player"), word.capitalize())
+        game.answered = False
+        game.accepting_answers = True
+        t = time.perf_counter()
+        await game.handle_answer(message)
+        times.append(time.perf_counter() - t)
+        assert game.answered, f"{word} was not accepted"
+        game.players_in_game.append(game.players_in_game.pop(0))
+    return [Result("handle_answer", times)]
+
+
+class AnswerCountingGame(ClassicGame):
+    # Counts answers reaching handle_answer instead of handling them
+    __slots__ = ("answers",)
+
+    def __init__(self, group_id: int) -> None:
+        super().__init__(group_id)
+        self.answers = 0
+
+    async def handle_answer(self, message: types.Message) -> None:
+        self.answers += 1
+
+
+async def reference_answer_handler(message: types.Message) -> None:
+    # answer_handler as it was before checking the game state first, for comparison
+    if message.text is None or not re.match(r"^[a-zA-Z]{1,100}$", message.text):
+        return
+
+    game = GlobalState.games[message.chat.id]
+    if (
+        game.players_in_game
+        and message.from_user
+        and message.from_user.id == game.players_in_game[0].user_id
+        and not game.answered
+        and game.accepting_answers
+    ):
+        await game.handle_answer(message)
+
+
+@benchmark("answer_handler")
+async def bench_answer_handler(ctx: Context) -> list[Result]:
+    # Messages of a busy group with a game: mostly chatter from everyone, some answers from the current player
+    chatter = ["lol", "gg", "nice", "bruh", "ok", "wait what", "Hmm", "/stats", "skip pls", "ez", "😂", "no u"]
+    players = make_players(10)
+    spectators = [types.User(id=1000 + i, is_bot=False, first_name="Spectator") for i in range(20)]
+    users = [types.User(id=p.user_id, is_bot=False, first_name=p.name) for p in players] + spectators
+    messages = []
+    for _ in range(2000):
+        if ctx.rng.random() < 0.1:  # Answer attempt of the current player
+            messages.append(make_message(users[0], ctx.rng.choice(ctx.wordlist).capitalize()))
+        else:
+            messages.append(make_message(ctx.rng.choice(users), ctx.rng.choice(chatter + ctx.wordlist[:10])))
+
+    game = AnswerCountingGame(-100)
+    game.players = players
+    game.players_in_game = players[:]
+    GlobalState.games[game.group_id] = game
+
+    results = []
+    try:
+        for phase in ("joining", "running"):
+            game.state = GameState.JOINING if phase == "joining" else GameState.RUNNING
+            game.accepting_answers = phase == "running"
+            for name, handler in (("answer_handler", answer_handler), ("reference", reference_answer_handler)):
+                game.answers = 0
+                times = []
+                for _ in range(ctx.iterations):
+                    t = time.perf_counter()
+                    for message in messages:
+                        await handler(message)
+                    times.append(time.perf_counter() - t)
+                results.append(Result(f"answer_handler[{phase},{name}]", times, len(messages)))
+                if phase == "running":
+                    assert game.answers, f"{name} did not pass any answers on"
+    finally:
+        del GlobalState.games[game.group_id]
+
+    # Mix of words, capitalised words and chatter given to is_word
+    texts = ctx.rng.sample(ctx.wordlist, 5000) + [w.capitalize() for w in ctx.rng.sample(ctx.wordlist, 2500)]
+    texts += [ctx.rng.choice(chatter) for _ in range(2500)]
+
+    def run_is_word() -> None:
+        for text in texts:
+            is_word(text)
+
+    def run_reference_is_word() -> None:
+        for text in texts:
+            all(c in "abcdefghijklmnopqrstuvwxyz" for c in text)
+
+    results.append(measure("is_word", run_is_word, ctx.iterations, len(texts)))
+    results.append(measure("is_word[reference]", run_reference_is_word, ctx.iterations, len(texts)))
+    return results
+
+
+def reference_inline_page(text: str) -> list[types.InlineQueryResultUnion]:
+    # First page of inline query results as built before paging and caching, for comparison
+    results: list[types.InlineQueryResultUnion] = []
+    for word in default_dictionary.dawg.iterkeys(text):
+        word = word.capitalize()
+        results.append(
+            types.InlineQueryResultArticle(
+                id=str(uuid4()),
+                title=word,
+                input_message_content=types.InputTextMessageContent(message_text=word)
+            )
+        )
+        if len(results) == 50:
+            break
+    return results
+
+
+@benchmark("inline_pages")
+async def bench_inline_pages(ctx: Context) -> list[Result]:
+    # Queries as typed keystroke by keystroke, many users typing the same common prefixes
+    queries: list[str] = []
+    for w in ctx.rng.sample(ctx.wordlist, 200):
+        queries.extend(w[:i] for i in range(1, min(len(w), 6) + 1))
+
+    def run(cached: bool) -> None:
+        if not cached:
+            inline_pages.clear()
+        for q in queries:
+            get_inline_page(q, "")
+
+    # Every page of a common prefix, following next_offset
+    prefix = max("abcdefghijklmnopqrstuvwxyz", key=lambda c: len(default_dictionary.dawg.keys(c)))
+
+    def run_paging() -> None:
+        inline_pages.clear()
+        results, offset = get_inline_page(prefix, "")
+        while offset:
+            results, offset = get_inline_page(prefix, offset)
+
+    pages = -(-len(default_dictionary.dawg.keys(prefix)) // INLINE_PAGE_SIZE)
+    return [
+        measure("inline_pages[uncached]", lambda: run(False), ctx.iterations, len(queries)),
+        measure("inline_pages[cached]", lambda: run(True), ctx.iterations, len(queries)),
+        measure(
+            "inline_pages[reference]",
+            lambda: [reference_inline_page(q) for q in queries],
+            ctx.iterations,
+            len(queries)
+        ),
+        measure(f"inline_pages[all_pages_of_{prefix}]", run_paging, max(ctx.iterations // 10, 3), pages)
+    ]
+
+
+@benchmark("vp_strategy")
+async def bench_vp_strategy(ctx: Context) -> list[Result]:
+    # Time per VP move for each difficulty in the game modes supporting VPs, along a chain of random answers
+    results = []
+    for game_type in (ClassicGame, BannedLettersGame, RequiredLetterGame, ChaosGame):
+        random.seed(ctx.seed)
+        game = game_type(-100)
+        game.players = make_players(2)
+        game.players_in_game = game.players[:]
+        await game.running_initialization()
+        game.min_letters_limit = 5
+
+        for difficulty in DIFFICULTIES:
+            times = []
+            for _ in range(ctx.iterations):
+                t = time.perf_counter()
+                choose_vp_answer(game, difficulty, GameSettings.VP_MOVE_CPU_BUDGET_SECONDS)
+                times.append(time.perf_counter() - t)
+                word = game.get_random_valid_answer()
+                if word:
+                    game.post_turn_processing(word)
+            results.append(Result(f"vp_strategy[{game_type.__name__},{difficulty}]", times))
+    return results
+
+
+@benchmark("elimination_leaderboard")
+async def bench_elimination_leaderboard(ctx: Context) -> list[Result]:
+    game = EliminationGame(-100)
+    game.players = make_players(50)
+    game.players_in_game = game.players[:]
+    for p in game.players:
+        p.score = ctx.rng.randint(0, 200)
+    shown = [ctx.rng.choice(game.players) for _ in range(50)]
+
+    def run_highlighted() -> None:
+        for p in shown:
+            game.get_leaderboard(show_player=p)
+
+    return [
+        measure("elimination_leaderboard[full]", game.get_leaderboard, ctx.iterations * 10),
+        measure("elimination_leaderboard[highlighted]", run_highlighted, ctx.iterations, len(shown))
+    ]
+
+
+@benchmark("rank_service")
+async def bench_rank_service(ctx: Context) -> list[Result]:
+    # Ranks among a million players, with changes of recent games applied on top of the snapshot
+    scores = array("q", (int(ctx.rng.expovariate(1 / 50)) for _ in range(1_000_000)))
+    ranking = Ranking()
+    ranking.start_refresh()
+    ranking.finish_refresh(sort_scores(scores), (1, 1, ()))
+    for xid in range(1, 1001):
+        old = ctx.rng.choice(scores)
+        ranking.record(old, old + ctx.rng.randint(0, 3), xid)
+    queries = [ctx.rng.choice(scores) for _ in range(1000)]
+
+    def run() -> None:
+        for score in queries:
+            ranking.count_higher(score)
+
+    def run_reference() -> None:
+        # Counting all higher scores, like COUNT(*) WHERE win_count > $1 in the database
+        for score in queries[:10]:
+            sum(s > score for s in scores)
+
+    return [
+        measure("rank_service", run, ctx.iterations, len(queries)),
+        measure("rank_service[reference]", run_reference, 3, 10),
+        measure("rank_service[refresh_sort]", lambda: sort_scores(scores), 3)
+    ]
+
+
+@benchmark("game_memory")
+async def bench_game_memory(ctx: Context) -> list[Result]:
+    # Memory retained by full games and allocations of rendering 300-player turn order listings
+    n_games = 20
+    n_players = GameSettings.INCREASED_MAX_PLAYERS
+
+    def new_games() -> list[ClassicGame]:
+        games = []
+        for i in range(n_games):
+            game = ClassicGame(-100 - i)
+            game.players = make_players(n_players)
+            game.players_in_game = game.players[:]
+            for word in ctx.rng.sample(ctx.wordlist, 200):
+                game.used_words.add(word)
+            games.append(game)
+        return games
+
+    tracemalloc.start()
+    t = time.perf_counter()
+    games = new_games()
+    elapsed = time.perf_counter() - t
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    def render_turn_order() -> None:
+        for game in games:
+            "\n".join(p.mention for p in game.players_in_game)
+
+    # Player names are rendered on first use and kept for later listings
+    tracemalloc.start()
+    render_turn_order()
+    rendered = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    turn_order = measure("game_memory[turn_order_listing]", render_turn_order, ctx.iterations, n_games)
+    turn_order.memory = {
+        "peak_bytes_per_listing": trace_peak(render_turn_order) // n_games,
+        "retained_bytes_per_game_by_names": rendered // n_games
+    }
+    return [
+        Result(
+            "game_memory[create]",
+            [elapsed],
+            n_games,
+            {"retained_bytes_per_game": retained // n_games, "players_per_game": n_players}
+        ),
+        turn_order
+    ]
+
+
+@benchmark("update_db")
+async def bench_update_db(ctx: Context) -> list[Result]:
+    # Runs against a scratch schema in a local PostgreSQL database, skipped without --db-uri
+    if not ctx.db_uri:
+        return []
+
+    import asyncpg
+
+    from on9wordchainbot import resources
+
+    schema = f"on9wcb_bench_{os.getpid()}"
+    admin_conn = await asyncpg.connect(ctx.db_uri)
+    await admin_conn.execute(f"CREATE SCHEMA {schema};")
+    try:
+        resources.pool = await asyncpg.create_pool(ctx.db_uri, server_settings={"search_path": schema})
+        with open(INIT_SQL) as f:
+            await resources.pool.execute(f.read())
+
+        times = []
+        start_time = datetime.now().replace(microsecond=0)
+        for i in range(ctx.iterations):
+            game = ClassicGame(-100 - i % 10)
+            game.players = make_players(10)
+            game.players_in_game = game.players[:1]
+            for p in game.players:
+                p.word_count = ctx.rng.randint(0, 30)
+                p.letter_count = p.word_count * 7
+                p.longest_word = "benchmark"
+            game.start_time = start_time + timedelta(minutes=i)
+            game.end_time = game.start_time + timedelta(minutes=5)
+
+            t = time.perf_counter()
+            await game.update_db()
+            # update_db updates players in background tasks
+            await asyncio.gather(*(asyncio.all_tasks() - {asyncio.current_task()}))
+            times.append(time.perf_counter() - t)
+        return [Result("update_db", times)]
+    finally:
+        if resources.pool:
+            await resources.pool.close()
+            resources.pool = None
+        await admin_conn.execute(f"DROP SCHEMA {schema} CASCADE;")
+        await admin_conn.close()
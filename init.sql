@@ -5,7 +5,8 @@ CREATE TABLE player (
     win_count INTEGER NOT NULL,
     word_count INTEGER NOT NULL,
     letter_count INTEGER NOT NULL,
-    longest_word TEXT
+    longest_word TEXT,
+    name TEXT  -- Full name as of the last game, for leaderboards
 );
 
 CREATE TABLE game (
@@ -46,3 +47,49 @@ CREATE TABLE wordlist (
     accepted BOOLEAN NOT NULL,
     reason TEXT
 );
+
+CREATE INDEX wordlist_word_idx ON wordlist (word);
+
+CREATE TABLE groupdictionary (
+    group_id BIGINT PRIMARY KEY,
+    dictionary TEXT NOT NULL
+);
+
+-- Games played to be ranked by win rate, also read by the bot
+CREATE FUNCTION leaderboard_min_games() RETURNS INTEGER IMMUTABLE LANGUAGE SQL AS 'SELECT 20';
+
+-- Top 10 players of each group and of all groups (group_id 0) by category, refreshed periodically by the bot
+CREATE MATERIALIZED VIEW leaderboard AS
+    WITH stats AS (
+        SELECT 0::BIGINT AS group_id, user_id, game_count, win_count, word_count, letter_count
+            FROM player
+        UNION ALL
+        SELECT group_id, user_id, COUNT(*), COUNT(*) FILTER (WHERE won), SUM(word_count), SUM(letter_count)
+            FROM gameplayer
+            GROUP BY group_id, user_id
+    ),
+    scores AS (
+        SELECT group_id, category, user_id, score
+            FROM stats
+            CROSS JOIN LATERAL (
+                VALUES
+                    ('wins', win_count::NUMERIC),
+                    ('words', word_count::NUMERIC),
+                    ('letters', letter_count::NUMERIC),
+                    (
+                        'winrate',
+                        CASE WHEN game_count >= leaderboard_min_games() THEN win_count::NUMERIC / game_count END
+                    )
+            ) AS s (category, score)
+            WHERE score IS NOT NULL
+    )
+    SELECT group_id, category, rank, user_id, score, player.name
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY group_id, category ORDER BY score DESC, user_id) AS rank
+                FROM scores
+        ) ranked
+        LEFT JOIN player USING (user_id)
+        WHERE rank <= 10;
+
+-- Required for refreshing concurrently
+CREATE UNIQUE INDEX ON leaderboard (group_id, category, rank);
@@ -0,0 +1,14 @@
+-- Adds tables and indexes needed by /dictionary and /exists to databases created before them.
+-- Safe to run more than once.
+BEGIN;
+
+-- Dictionaries chosen by groups with /dictionary
+CREATE TABLE IF NOT EXISTS groupdictionary (
+    group_id BIGINT PRIMARY KEY,
+    dictionary TEXT NOT NULL
+);
+
+-- Looking up many words at once
+CREATE INDEX IF NOT EXISTS wordlist_word_idx ON wordlist (word);
+
+COMMIT;
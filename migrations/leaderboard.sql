@@ -0,0 +1,48 @@
+-- Adds /leaderboard to databases created before it, run once after updating.
+-- The view and function below must match init.sql.
+BEGIN;
+
+ALTER TABLE player ADD COLUMN IF NOT EXISTS name TEXT;  -- Full name as of the last game, for leaderboards
+
+DROP MATERIALIZED VIEW IF EXISTS leaderboard;
+
+-- Games played to be ranked by win rate, also read by the bot
+CREATE OR REPLACE FUNCTION leaderboard_min_games() RETURNS INTEGER IMMUTABLE LANGUAGE SQL AS 'SELECT 20';
+
+-- Top 10 players of each group and of all groups (group_id 0) by category, refreshed periodically by the bot
+CREATE MATERIALIZED VIEW leaderboard AS
+    WITH stats AS (
+        SELECT 0::BIGINT AS group_id, user_id, game_count, win_count, word_count, letter_count
+            FROM player
+        UNION ALL
+        SELECT group_id, user_id, COUNT(*), COUNT(*) FILTER (WHERE won), SUM(word_count), SUM(letter_count)
+            FROM gameplayer
+            GROUP BY group_id, user_id
+    ),
+    scores AS (
+        SELECT group_id, category, user_id, score
+            FROM stats
+            CROSS JOIN LATERAL (
+                VALUES
+                    ('wins', win_count::NUMERIC),
+                    ('words', word_count::NUMERIC),
+                    ('letters', letter_count::NUMERIC),
+                    (
+                        'winrate',
+                        CASE WHEN game_count >= leaderboard_min_games() THEN win_count::NUMERIC / game_count END
+                    )
+            ) AS s (category, score)
+            WHERE score IS NOT NULL
+    )
+    SELECT group_id, category, rank, user_id, score, player.name
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY group_id, category ORDER BY score DESC, user_id) AS rank
+                FROM scores
+        ) ranked
+        LEFT JOIN player USING (user_id)
+        WHERE rank <= 10;
+
+-- Required for refreshing concurrently
+CREATE UNIQUE INDEX ON leaderboard (group_id, category, rank);
+
+COMMIT;
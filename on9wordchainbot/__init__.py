@@ -3,9 +3,12 @@ import logging
 from aiogram import Dispatcher
 from periodic import Periodic
 
+from on9wordchainbot.constants import LEADERBOARD_REFRESH_SECONDS, RANK_REFRESH_SECONDS
+from on9wordchainbot.ranks import rank_service
 from on9wordchainbot.resources import init_resources, close_resources
 from on9wordchainbot.utils import send_admin_group
-from on9wordchainbot.words import Words
+from on9wordchainbot.watchdog import LoopWatchdog
+from on9wordchainbot.words import update_dictionaries
 
 try:
     import coloredlogs
@@ -25,21 +28,32 @@ else:
     uvloop.install()
 
 # ----- Initialize dispatcher -----
-from on9wordchainbot.handlers import routers
+from on9wordchainbot.handlers import gameplay, routers
 from on9wordchainbot.handlers.errors import error_handler
+from on9wordchainbot.handlers.stats import refresh_leaderboard
+from on9wordchainbot.middlewares import ChatLockMiddleware
 
 dp = Dispatcher()
 dp.include_routers(*routers)
+# Only handlers which change games, so other commands in a group with a game do not wait for it
+gameplay.router.message.middleware(ChatLockMiddleware())
+gameplay.router.edited_message.middleware(ChatLockMiddleware())
 dp.error.register(error_handler)
 
+loop_watchdog = LoopWatchdog()
+
 
 @dp.startup()
 async def startup():
     await init_resources()
-    await Periodic(60 * 60, Words.update).start(delay=0)  # Run Words.update every hour
+    loop_watchdog.start()
+    await Periodic(60 * 60, update_dictionaries).start(delay=0)  # Run update_dictionaries every hour
+    await Periodic(LEADERBOARD_REFRESH_SECONDS, refresh_leaderboard).start()
+    await Periodic(RANK_REFRESH_SECONDS, rank_service.refresh).start(delay=0)
     await send_admin_group("Bot starting.")
 
 @dp.shutdown()
 async def shutdown():
+    loop_watchdog.stop()
     await close_resources()
     await send_admin_group("Bot stopping.")
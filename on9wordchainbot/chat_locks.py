@@ -0,0 +1,59 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+
+class ChatLock:
+    __slots__ = ("lock", "users", "holder")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.users = 0  # Tasks holding or waiting for the lock
+        self.holder: Optional["asyncio.Task[object]"] = None
+
+
+class ChatLocks:
+    # One lock per chat so that a chat is handled by one task at a time while chats run in parallel.
+    # asyncio.Lock wakes up waiters in order of arrival, so updates of a chat are processed in order.
+    # Locks are dropped once no task holds or waits for them.
+
+    def __init__(self) -> None:
+        self.locks: dict[int, ChatLock] = {}
+
+    @asynccontextmanager
+    async def hold(self, chat_id: int) -> AsyncIterator[None]:
+        # Not reentrant, a task holding the lock of a chat must not hold it again
+        chat_lock = self.locks.get(chat_id)
+        if chat_lock is None:
+            chat_lock = self.locks[chat_id] = ChatLock()
+        chat_lock.users += 1
+        try:
+            await chat_lock.lock.acquire()
+            chat_lock.holder = asyncio.current_task()
+            try:
+                yield
+            finally:
+                # Not held if re-acquiring it in released() was cancelled
+                if chat_lock.holder is asyncio.current_task():
+                    chat_lock.holder = None
+                    chat_lock.lock.release()
+        finally:
+            chat_lock.users -= 1
+            if not chat_lock.users:
+                del self.locks[chat_id]
+
+    @asynccontextmanager
+    async def released(self, chat_id: int) -> AsyncIterator[None]:
+        # Let other tasks handle the chat while waiting, if the current task holds its lock
+        chat_lock = self.locks.get(chat_id)
+        if chat_lock is None or chat_lock.holder is not asyncio.current_task():
+            yield
+            return
+
+        chat_lock.holder = None
+        chat_lock.lock.release()
+        try:
+            yield
+        finally:
+            await chat_lock.lock.acquire()
+            chat_lock.holder = asyncio.current_task()
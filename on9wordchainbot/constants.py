@@ -1,6 +1,7 @@
 import json
 import logging
 import os
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
@@ -20,10 +21,57 @@ OFFICIAL_GROUP_ID: int = config["OFFICIAL_GROUP_ID"]
 WORD_ADDITION_CHANNEL_ID: int = config["WORD_ADDITION_CHANNEL_ID"]
 VIP: list[int] = config["VIP"]
 VIP_GROUP: list[int] = config["VIP_GROUP"]
+METRICS_PORT: Optional[int] = config.get("METRICS_PORT")
+VP_TOKENS: list[str] = config.get("VP_TOKENS", [])  # Extra virtual player bots
 
 WORDLIST_SOURCE = "https://raw.githubusercontent.com/dwyl/english-words/master/words.txt"
+# Dictionary sources, see README
+WORDLIST_SOURCES: list[dict[str, str]] = config.get(
+    "WORDLIST_SOURCES", [{"type": "url", "url": WORDLIST_SOURCE}, {"type": "db"}]
+)
+WORDLIST_CACHE_DIR: str = config.get("WORDLIST_CACHE_DIR", "wordlist_cache")
+# Dictionary name -> sources. The default dictionary uses WORDLIST_SOURCES.
+DEFAULT_DICTIONARY: str = config.get("DEFAULT_DICTIONARY", "en")
+DICTIONARIES: dict[str, list[dict[str, str]]] = {DEFAULT_DICTIONARY: WORDLIST_SOURCES, **config.get("DICTIONARIES", {})}
+DICTIONARY_IDLE_SECONDS = 60 * 60  # Unload other dictionaries unused for this long
 
 STAR = "\u2b50\ufe0f"
+MESSAGE_LENGTH_LIMIT = 4096  # Longer replies are sent as a text file
+REMAINING_ANSWERS_CACHE_SIZE = 64  # Answer constraints with numbers of possible answers kept per game
+
+# /leaderboard, ranked by the leaderboard materialized view in init.sql
+LEADERBOARD_REFRESH_SECONDS = 10 * 60
+LEADERBOARD_CACHE_SECONDS = 60  # Rendered leaderboards
+
+# Global ranks in /stats and /groupstats, from snapshots of all scores in memory
+RANK_REFRESH_SECONDS = 60 * 60
+RANK_FETCH_ROWS = 10000  # Scores fetched from the database at a time
+RANK_MAX_PENDING_CHANGES = 10000  # Refresh early once this many changes are applied on top of a snapshot
+
+# /sql limits, so that large results do not exhaust memory
+SQL_STATEMENT_TIMEOUT_SECONDS = 30
+SQL_FETCH_ROWS = 1000  # Rows fetched from the database at a time
+SQL_TEXT_MAX_ROWS = 20  # Larger results are sent as a CSV file
+SQL_MAX_ROWS = 1_000_000
+
+# "Did you mean" suggestions for words not in the dictionary
+SUGGESTION_LIMIT = 3
+# For words two or more edits away, words one edit away are always found.
+# The search runs on the event loop, so it is cut short to keep other updates responsive.
+SUGGESTION_TIME_BUDGET_SECONDS = 0.02
+
+# Word search with inline queries
+INLINE_PAGE_SIZE = 50  # Max results per answer allowed by Telegram
+INLINE_PAGE_CACHE_SIZE = 1000  # Recently answered pages kept in memory
+INLINE_CACHE_SECONDS = 5 * 60  # Caching of answers by Telegram
+
+# Drain mode (/drain) for restarting without killing games
+DEFAULT_DRAIN_MINUTES = 30
+DRAIN_PROGRESS_INTERVAL_SECONDS = 30
+
+# Report event loop stalls longer than the threshold to the admin group, at most once per interval
+LOOP_LAG_THRESHOLD_SECONDS = 1
+LOOP_LAG_REPORT_INTERVAL_SECONDS = 5 * 60
 
 
 class GameState:
@@ -45,6 +93,12 @@ class GameSettings:
     MAX_WORD_LENGTH_LIMIT = 10
     WORD_LENGTH_LIMIT_INCREASE_PER_LIMIT_CHANGE = 1
     TURNS_BETWEEN_LIMITS_CHANGE = 5
+    VP_MOVE_CPU_BUDGET_SECONDS = 0.05
+    VP_TRAP_CANDIDATES = 200  # Valid answers sampled by hard virtual players when looking for a trap
+    # Shared by all virtual players in a group, like the group message limit of a single bot
+    VP_MESSAGES_PER_MINUTE = 20
+    # Of each virtual player bot across all groups, like the bot-wide message limit
+    VP_MESSAGES_PER_SECOND = 30
 
     ELIM_JOINING_PHASE_SECONDS = 90
     ELIM_MIN_PLAYERS = 5
@@ -38,4 +38,11 @@ class HasGameInstance(Filter):
         return message.chat.id in GlobalState.games
 
 
-filters = [IsOwner, IsVIP, IsAdmin, HasGameInstance]
+class IsAnswer(Filter):
+    # Checked without the chat lock, so other messages of a group with a game are not held up by it
+    async def __call__(self, message: types.Message) -> bool:
+        game = GlobalState.games.get(message.chat.id)
+        return game is not None and game.is_answer(message)
+
+
+filters = [IsOwner, IsVIP, IsAdmin, HasGameInstance, IsAnswer]
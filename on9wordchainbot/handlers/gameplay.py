@@ -1,16 +1,20 @@
 import asyncio
+import logging
 import re
-from typing import Type
+from typing import Optional, Type
 
 from aiogram import Router, types
 from aiogram.filters import Command, CommandObject
 
 from on9wordchainbot.constants import GameSettings, GameState, VIP, VIP_GROUP
-from on9wordchainbot.filters import HasGameInstance, IsAdmin, IsOwner
+from on9wordchainbot.filters import HasGameInstance, IsAdmin, IsAnswer, IsOwner
+from on9wordchainbot.metrics import HANDLE_ANSWER_SECONDS
 from on9wordchainbot.models import ClassicGame, EliminationGame, GAME_MODES, MixedEliminationGame
-from on9wordchainbot.resources import GlobalState, on9bot
-from on9wordchainbot.utils import amt_donated, send_groups_only_message
+from on9wordchainbot.models.vp_strategy import DEFAULT_DIFFICULTY, DIFFICULTIES
+from on9wordchainbot.resources import GlobalState, on9bot, vp_bots
+from on9wordchainbot.utils import amt_donated, get_group_dictionary, send_groups_only_message
 
+logger = logging.getLogger(__name__)
 router = Router(name=__name__)
 
 
@@ -48,11 +52,23 @@ async def start_game(message: types.Message, game_type: Type[ClassicGame]) -> No
         )
         return
 
+    # Other dictionaries are loaded on first use
+    try:
+        dictionary = await get_group_dictionary(group_id)
+    except Exception:
+        logger.exception(f"Failed to load the dictionary of group {group_id}")
+        await message.reply("The dictionary of this group is unavailable right now. Please try again later.")
+        return
+    # Game modes choose letters and words from the dictionary
+    if not dictionary.count or not dictionary.count_words(min_len=GameSettings.MIN_WORD_LENGTH_LIMIT):
+        await message.reply("The dictionary of this group has no words to play with.")
+        return
+
     async with GlobalState.games_lock:  # Avoid duplicate game creation
         if group_id in GlobalState.games:
             asyncio.create_task(GlobalState.games[group_id].join(message))
         else:
-            game = game_type(message.chat.id)
+            game = game_type(message.chat.id, dictionary)
             GlobalState.games[group_id] = game
             asyncio.create_task(game.main_loop(message))
 
@@ -83,7 +99,7 @@ async def cmd_forcejoin(message: types.Message) -> None:
     group_id = message.chat.id
     rmsg = message.reply_to_message
     if rmsg and rmsg.from_user.is_bot:  # On9Bot only
-        if rmsg.from_user.id == on9bot.id:
+        if rmsg.from_user.id in vp_bots:
             await cmd_addvp(message)
         return
     await GlobalState.games[group_id].forcejoin(message)
@@ -122,7 +138,8 @@ async def cmd_killgame(message: types.Message, command: CommandObject) -> None:
         return
 
     GlobalState.games[group_id].state = GameState.KILLGAME
-    await asyncio.sleep(2)
+    async with GlobalState.chat_locks.released(message.chat.id):  # Let the game loop end the game
+        await asyncio.sleep(2)
 
     # If game is still not terminated
     if group_id in GlobalState.games:
@@ -138,7 +155,7 @@ async def cmd_forceskip(message: types.Message) -> None:
 
 
 @router.message(Command("addvp"), HasGameInstance())
-async def cmd_addvp(message: types.Message) -> None:
+async def cmd_addvp(message: types.Message, command: Optional[CommandObject] = None) -> None:
     group_id = message.chat.id
     on9bot_user = await on9bot.me()
     if isinstance(GlobalState.games[group_id], EliminationGame):
@@ -147,7 +164,12 @@ async def cmd_addvp(message: types.Message) -> None:
             "can't play elimination games."
         )
         return
-    await GlobalState.games[group_id].addvp(message)
+
+    difficulty = command.args.strip().lower() if command and command.args else DEFAULT_DIFFICULTY
+    if difficulty not in DIFFICULTIES:
+        await message.reply(f"Usage: `/addvp [{'|'.join(DIFFICULTIES)}]`")
+        return
+    await GlobalState.games[group_id].addvp(message, difficulty)
 
 
 @router.message(Command("remvp"), HasGameInstance())
@@ -176,17 +198,11 @@ async def cmd_incmaxp(message: types.Message) -> None:
     )
 
 
-@router.message(HasGameInstance())
-@router.edited_message(HasGameInstance())
+@router.message(IsAnswer())
+@router.edited_message(IsAnswer())
 async def answer_handler(message: types.Message) -> None:
-    if message.text is None or not re.match(r"^[a-zA-Z]{1,100}$", message.text):
-        return
-
-    game = GlobalState.games[message.chat.id]
-    if (
-        game.players_in_game
-        and message.from_user.id == game.players_in_game[0].user_id
-        and not game.answered
-        and game.accepting_answers
-    ):
-        await game.handle_answer(message)
+    # Checked again with the chat lock held, since another answer may have been accepted while waiting for it
+    game = GlobalState.games.get(message.chat.id)
+    if game is not None and game.is_answer(message):
+        with HANDLE_ANSWER_SECONDS.time(game.__class__.__name__):
+            await game.handle_answer(message)
@@ -11,7 +11,7 @@ from on9wordchainbot.resources import GlobalState
 from on9wordchainbot.constants import GameState
 from on9wordchainbot.utils import inline_keyboard_from_button, send_private_only_message
 from on9wordchainbot.filters import IsOwner
-from on9wordchainbot.words import Words
+from on9wordchainbot.words import default_dictionary
 
 router = Router(name=__name__)
 
@@ -111,7 +111,7 @@ async def cmd_runinfo(message: types.Message) -> None:
     await message.reply(
         f"Build time: `{build_time_str}`\n"
         f"Uptime: `{uptime.days}.{str(uptime).rsplit(maxsplit=1)[-1]}`\n"
-        f"Words in dictionary: `{Words.count}`\n"
+        f"Words in dictionary: `{default_dictionary.count}`\n"
         f"Total games: `{len(GlobalState.games)}`\n"
         f"Running games: `{len([g for g in GlobalState.games.values() if g.state == GameState.RUNNING])}`\n"
         f"Players: `{sum(len(g.players) for g in GlobalState.games.values())}`"
@@ -1,23 +1,38 @@
 import asyncio
+import csv
+import hashlib
 import logging
-from uuid import uuid4
+import tempfile
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
 
-from aiogram import Router, F, types
+from aiogram import Dispatcher, Router, F, types
 from aiogram.enums import ChatType
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
 from aiogram.filters import JOIN_TRANSITION, ChatMemberUpdatedFilter, Command, CommandObject, CommandStart
+from asyncpg import Record
 
 from on9wordchainbot.resources import GlobalState, get_pool
-from on9wordchainbot.constants import ADMIN_GROUP_ID, OFFICIAL_GROUP_ID, VIP
+from on9wordchainbot.constants import (ADMIN_GROUP_ID, DEFAULT_DRAIN_MINUTES, DRAIN_PROGRESS_INTERVAL_SECONDS,
+                                       INLINE_CACHE_SECONDS, INLINE_PAGE_CACHE_SIZE, INLINE_PAGE_SIZE,
+                                       MESSAGE_LENGTH_LIMIT, OFFICIAL_GROUP_ID, SQL_FETCH_ROWS, SQL_MAX_ROWS,
+                                       SQL_STATEMENT_TIMEOUT_SECONDS, SQL_TEXT_MAX_ROWS, VIP, GameState)
 from on9wordchainbot.filters import IsOwner
 from on9wordchainbot.handlers.donation import send_donate_invoice
 from on9wordchainbot.models import GAME_MODES
-from on9wordchainbot.utils import ADD_TO_GROUP_KEYBOARD, amt_donated, awaitable_to_coroutine, is_word
-from on9wordchainbot.words import Words
+from on9wordchainbot.utils import (ADD_TO_GROUP_KEYBOARD, amt_donated, awaitable_to_coroutine, is_word,
+                                   send_admin_group)
+from on9wordchainbot.words import WordList, default_dictionary
 
 logger = logging.getLogger(__name__)
 
 router = Router(name=__name__)
 
+# (query, offset) -> (word list, results, next offset) of recently answered inline query pages
+inline_pages: OrderedDict[tuple[str, str], tuple[WordList, list[types.InlineQueryResultUnion], str]] = OrderedDict()
+
 
 @router.message(CommandStart(), F.chat.type == ChatType.PRIVATE)
 async def cmd_start(message: types.Message) -> None:
@@ -58,6 +73,113 @@ async def cmd_maintmode(message: types.Message) -> None:
     )
 
 
+def get_drain_progress(deadline: datetime) -> str:
+    running = [g for g in GlobalState.games.values() if g.state == GameState.RUNNING]
+    seconds_left = max(int((deadline - datetime.now()).total_seconds()), 0)
+    return (
+        "Draining games before restart.\n"
+        f"Games remaining: `{len(GlobalState.games)}` (`{len(running)}` running)\n"
+        f"Players remaining: `{sum(len(g.players_in_game) for g in running)}`\n"
+        f"Deadline: `{seconds_left // 60}m {seconds_left % 60:02}s`"
+    )
+
+
+async def drain(dispatcher: Dispatcher, deadline: datetime) -> None:
+    # Wait for running games to finish, reporting progress in the admin group,
+    # then stop polling so that run_forever.py restarts the bot with the new build
+    try:
+        await wait_for_games(deadline)
+        await send_admin_group("All games drained. Restarting.")
+        await dispatcher.stop_polling()
+    except Exception:
+        logger.exception("Failed to drain games")
+        GlobalState.maint_mode = GlobalState.maint_mode_before_drain
+        try:
+            await send_admin_group("Draining failed and has been cancelled, see the logs.")
+        except TelegramAPIError:
+            pass
+    finally:
+        if GlobalState.drain_task is asyncio.current_task():  # Not already cleared by /drain off
+            GlobalState.drain_task = None
+
+
+async def wait_for_games(deadline: datetime) -> None:
+    text = get_drain_progress(deadline)
+    msg = await send_admin_group(text)
+    loop = asyncio.get_running_loop()
+    next_edit = loop.time() + DRAIN_PROGRESS_INTERVAL_SECONDS
+
+    while GlobalState.games and datetime.now() < deadline:
+        # Woken up as soon as a game ends instead of polling
+        GlobalState.game_ended.clear()
+        timeout = min(next_edit - loop.time(), (deadline - datetime.now()).total_seconds())
+        try:
+            await asyncio.wait_for(GlobalState.game_ended.wait(), max(timeout, 0))
+        except TimeoutError:
+            pass
+        if loop.time() < next_edit:  # Only edit the progress periodically
+            continue
+        next_edit = loop.time() + DRAIN_PROGRESS_INTERVAL_SECONDS
+        new_text = get_drain_progress(deadline)
+        if new_text == text:  # Telegram rejects edits that do not modify the message
+            continue
+        text = new_text
+        try:
+            await msg.edit_text(text)
+        except TelegramBadRequest:
+            pass
+
+    if GlobalState.games:
+        # Deadline reached, end remaining games
+        await send_admin_group(f"Drain deadline reached. Ending {len(GlobalState.games)} remaining games.")
+        for game in list(GlobalState.games.values()):
+            try:
+                await game.send_message("The bot is restarting for an update. Sorry for the inconvenience!")
+            except TelegramAPIError:
+                pass
+            game.state = GameState.KILLGAME
+        await asyncio.sleep(2)  # Let game loops handle the termination
+        GlobalState.games.clear()
+
+
+@router.message(IsOwner(), Command("drain"))
+async def cmd_drain(message: types.Message, command: CommandObject, dispatcher: Dispatcher) -> None:
+    # Refuse new games, wait for existing games to end and restart for zero-downtime deploys
+    args = command.args
+    if args and args.lower() == "off":
+        if GlobalState.drain_task is None:
+            await message.reply("Not draining.")
+            return
+        GlobalState.drain_task.cancel()
+        GlobalState.drain_task = None
+        GlobalState.maint_mode = GlobalState.maint_mode_before_drain
+        await message.reply(
+            "Draining cancelled."
+            + ("" if GlobalState.maint_mode else " Maintenance mode has been switched off.")
+        )
+        return
+
+    if GlobalState.drain_task is not None:
+        await message.reply("Already draining. Use `/drain off` to cancel.")
+        return
+
+    try:
+        minutes = int(args or DEFAULT_DRAIN_MINUTES)
+        assert minutes >= 0, "smh"
+    except (ValueError, AssertionError) as e:
+        await message.reply(f"`{e.__class__.__name__}: {str(e)}`")
+        return
+
+    GlobalState.maint_mode_before_drain = GlobalState.maint_mode
+    GlobalState.maint_mode = True
+    deadline = datetime.now() + timedelta(minutes=minutes)
+    GlobalState.drain_task = asyncio.create_task(drain(dispatcher, deadline))
+    await message.reply(
+        f"Maintenance mode has been switched on. Draining {len(GlobalState.games)} games "
+        f"with a deadline of {minutes} minutes."
+    )
+
+
 @router.message(Command("leave"), IsOwner(), F.chat.type.in_((ChatType.GROUP, ChatType.SUPERGROUP)))
 async def cmd_leave(message: types.Message) -> None:
     await message.chat.leave()
@@ -69,22 +191,62 @@ async def cmd_sql(message: types.Message, command: CommandObject) -> None:
     if not args:
         return
 
-    pool = get_pool()
+    # Rows are fetched in pages with a cursor and written to a CSV file as they arrive,
+    # only keeping the first few rows in memory for a text reply
+    fd, filename = tempfile.mkstemp(suffix=".csv")
+    path = Path(filename)
     try:
-        async with pool.acquire() as conn:
-            res = await conn.fetch(args)
-    except Exception as e:
-        await message.reply(f"`{e.__class__.__name__}: {str(e)}`")
-        return
+        status = None
+        columns: list[str] = []
+        rows: list[Record] = []
+        row_count = 0
+        truncated = False
+        try:
+            with open(fd, "w", newline="") as f:
+                pool = get_pool()
+                async with pool.acquire() as conn:
+                    # Set for the session, as some statements cannot run in a transaction (e.g. VACUUM)
+                    await conn.execute(f"SET statement_timeout = {SQL_STATEMENT_TIMEOUT_SECONDS * 1000};")
+                    try:
+                        stmt = await conn.prepare(args)
+                        columns = [a.name for a in stmt.get_attributes()]
+                        if not columns:  # Statement without results, e.g. UPDATE, run as is without a transaction
+                            status = await conn.execute(args)
+                        else:
+                            writer = csv.writer(f)
+                            writer.writerow(columns)
+                            async with conn.transaction():  # Cursors require a transaction
+                                async for r in stmt.cursor(prefetch=SQL_FETCH_ROWS):
+                                    if row_count == SQL_MAX_ROWS:
+                                        truncated = True
+                                        break
+                                    writer.writerow(r.values())
+                                    if row_count < SQL_TEXT_MAX_ROWS:
+                                        rows.append(r)
+                                    row_count += 1
+                    finally:
+                        await conn.execute("RESET statement_timeout;")
+        except Exception as e:
+            await message.reply(f"`{e.__class__.__name__}: {str(e)}`")
+            return
 
-    if not res:
-        await message.reply("No results returned.")
-        return
+        if status:
+            await message.reply(f"`{status}`")
+            return
+        if not row_count:
+            await message.reply("No results returned.")
+            return
 
-    text = ["*" + " - ".join(res[0].keys()) + "*"]
-    for r in res:
-        text.append("`" + " - ".join(str(i) for i in r.values()) + "`")
-    await message.reply("\n".join(text))
+        text = ["*" + " - ".join(columns) + "*"]
+        for r in rows:
+            text.append("`" + " - ".join(str(i) for i in r.values()) + "`")
+        if row_count <= SQL_TEXT_MAX_ROWS and len("\n".join(text)) <= MESSAGE_LENGTH_LIMIT:
+            await message.reply("\n".join(text))
+        else:
+            caption = f"{row_count} rows" + (f", truncated to the first {SQL_MAX_ROWS}" if truncated else "")
+            await message.reply_document(types.FSInputFile(path, "result.csv"), caption=caption)
+    finally:
+        path.unlink()
 
 
 @router.chat_member(ChatMemberUpdatedFilter(JOIN_TRANSITION))
@@ -101,6 +263,41 @@ async def new_member(event: types.ChatMemberUpdated) -> None:
         )
 
 
+def get_inline_page(text: str, offset: str) -> tuple[list[types.InlineQueryResultUnion], str]:
+    # Results of words starting with text and the offset of the next page ("" if none).
+    # The offset is the last word of the previous page, so a page is found by binary search
+    # in the sorted word list instead of iterating over all previous pages.
+    words = default_dictionary.words
+    key = (text, offset)
+    page = inline_pages.get(key)
+    if page and page[0] is words:  # Not cached before the last dictionary update
+        inline_pages.move_to_end(key)
+        return page[1], page[2]
+
+    start, stop = words.prefix_range(text)
+    if offset:
+        start = bisect_right(words, offset, start, stop)
+    page_words = words.slice(start, min(start + INLINE_PAGE_SIZE, stop))
+    results: list[types.InlineQueryResultUnion] = []
+    for word in page_words:
+        word = word.capitalize()
+        results.append(
+            types.InlineQueryResultArticle(
+                id=hashlib.sha1(word.encode()).hexdigest(),  # Same id for the same word, ids are limited to 64 bytes
+                title=word,
+                input_message_content=types.InputTextMessageContent(message_text=word)
+            )
+        )
+    # Offsets are limited to 64 bytes. A truncated offset at worst repeats some words.
+    next_offset = page_words[-1][:64] if start + len(page_words) < stop else ""
+
+    inline_pages[key] = (words, results, next_offset)
+    inline_pages.move_to_end(key)
+    if len(inline_pages) > INLINE_PAGE_CACHE_SIZE:
+        inline_pages.popitem(last=False)
+    return results, next_offset
+
+
 @router.inline_query()
 async def inline_handler(inline_query: types.InlineQuery) -> None:
     bot = inline_query.bot
@@ -113,52 +310,42 @@ async def inline_handler(inline_query: types.InlineQuery) -> None:
             command = f"/{mode.command}@{bot_user.username}"
             results.append(
                 types.InlineQueryResultArticle(
-                    id=str(uuid4()),
+                    id=mode.command,
                     title="Start " + mode.name,
                     description=command,
                     input_message_content=types.InputTextMessageContent(message_text=command)
                 )
             )
-        await inline_query.answer(results, is_personal=not text)
+        await inline_query.answer(results, cache_time=INLINE_CACHE_SECONDS, is_personal=not text)
         return
 
     if not is_word(text):
         await inline_query.answer(
             [
                 types.InlineQueryResultArticle(
-                    id=str(uuid4()),
+                    id="invalid-query",
                     title="A query can only consist of alphabets",
                     description="Try a different query",
                     input_message_content=types.InputTextMessageContent(message_text=r"¯\\_(ツ)\_/¯")
                 )
             ],
+            cache_time=INLINE_CACHE_SECONDS,
             is_personal=True
         )
         return
 
-    for word in Words.dawg.iterkeys(text):
-        word = word.capitalize()
-        results.append(
-            types.InlineQueryResultArticle(
-                id=str(uuid4()),
-                title=word,
-                input_message_content=types.InputTextMessageContent(message_text=word)
-            )
-        )
-        if len(results) == 50:  # Max 50 results
-            break
-
-    if not results:  # No results
-        results.append(
+    results, next_offset = get_inline_page(text, inline_query.offset)
+    if not results and not inline_query.offset:  # No results
+        results = [
             types.InlineQueryResultArticle(
-                id=str(uuid4()),
+                id="no-results",
                 title="No results found",
                 description="Try a different query",
                 input_message_content=types.InputTextMessageContent(message_text=r"¯\\_(ツ)\_/¯")
             )
-        )
+        ]
 
-    await inline_query.answer(results, is_personal=True)
+    await inline_query.answer(results, cache_time=INLINE_CACHE_SECONDS, is_personal=True, next_offset=next_offset)
 
 
 @router.callback_query()
@@ -2,7 +2,7 @@ import asyncio
 import os
 import time
 from datetime import datetime, timedelta
-from typing import Any
+from typing import Any, Optional
 
 import aiofiles
 import aiofiles.os
@@ -10,18 +10,29 @@ import matplotlib.pyplot as plt
 from aiocache import cached
 from aiogram import Router, types, html
 from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramAPIError
 from aiogram.filters import Command, CommandObject
 from asyncpg import Record
 from matplotlib.dates import DateFormatter
 from matplotlib.ticker import MaxNLocator
 
-from on9wordchainbot.constants import STAR
-from on9wordchainbot.resources import get_pool
+from on9wordchainbot.constants import LEADERBOARD_CACHE_SECONDS, LEADERBOARD_REFRESH_SECONDS, STAR
+from on9wordchainbot.metrics import DB_QUERY_SECONDS, timed_acquire
+from on9wordchainbot.ranks import rank_service
+from on9wordchainbot.resources import bot, get_pool
 from on9wordchainbot.filters import IsOwner
 from on9wordchainbot.utils import has_star, send_groups_only_message
 
 router = Router(name=__name__)
 
+# /leaderboard category -> description
+LEADERBOARD_CATEGORIES = {
+    "wins": "games won",
+    "words": "words played",
+    "letters": "letters played",
+    "winrate": "win rate"
+}
+
 
 @router.message(Command("stat", "stats", "stalk"))
 async def cmd_stats(message: types.Message) -> None:
@@ -34,8 +45,9 @@ async def cmd_stats(message: types.Message) -> None:
     mention = user.mention_html(name=name)
 
     pool = get_pool()
-    async with pool.acquire() as conn:
-        res = await conn.fetchrow("SELECT * FROM player WHERE user_id = $1;", user.id)
+    async with timed_acquire(pool) as conn:
+        with DB_QUERY_SECONDS.time("stats"):
+            res = await conn.fetchrow("SELECT * FROM player WHERE user_id = $1;", user.id)
 
     if not res:
         await message.reply(
@@ -53,32 +65,132 @@ async def cmd_stats(message: types.Message) -> None:
     )
     if res["longest_word"]:
         text += f"\nLongest word: <b>{res['longest_word'].capitalize()}</b>"
+    ranks = [
+        format_rank(rank_service.rank("wins", res["win_count"]), "wins"),
+        format_rank(rank_service.rank("words", res["word_count"]), "words")
+    ]
+    if all(ranks):
+        text += f"\nGlobal rank: {', '.join(ranks)}"
     await message.reply(text, parse_mode=ParseMode.HTML)
 
 
+def format_rank(rank: Optional[tuple[int, int]], category: str) -> str:
+    # "#rank by category (top x%)", empty before ranks are loaded
+    if not rank:
+        return ""
+    position, total = rank
+    return f"<b>#{position}</b> by {category} (top {max(position / total, 0.001):.1%})"
+
+
 @router.message(Command("groupstats"))
 @send_groups_only_message
 async def cmd_groupstats(message: types.Message) -> None:
-    # TODO: Add top players in group (max 5) to message
     pool = get_pool()
-    async with pool.acquire() as conn:
-        player_cnt, game_cnt, word_cnt, letter_cnt = await conn.fetchrow(
-            """\
-            SELECT COUNT(DISTINCT user_id), COUNT(DISTINCT game_id), SUM(word_count), SUM(letter_count)
-                FROM gameplayer
-                WHERE group_id = $1;""",
-            message.chat.id
+    async with timed_acquire(pool) as conn:
+        with DB_QUERY_SECONDS.time("groupstats"):
+            player_cnt, game_cnt, word_cnt, letter_cnt = await conn.fetchrow(
+                """\
+                SELECT COUNT(DISTINCT user_id),
+                       -- Counted like the group_games ranking
+                       (SELECT COUNT(*) FROM game WHERE group_id = $1),
+                       SUM(word_count),
+                       SUM(letter_count)
+                    FROM gameplayer
+                    WHERE group_id = $1;""",
+                message.chat.id
+            )
+    text = (
+        f"\U0001f4ca Statistics for <b>{html.quote(message.chat.title)}</b>\n"
+        f"<b>{player_cnt}</b> players\n"
+        f"<b>{game_cnt}</b> games played\n"
+        f"<b>{word_cnt}</b> total words played\n"
+        f"<b>{letter_cnt}</b> total letters played"
+    )
+    if rank_text := format_rank(rank_service.rank("group_games", game_cnt), "games played"):
+        text += f"\nGlobal rank: {rank_text}"
+    text += "\n\nTop players:\n" + await get_leaderboard_text(message.chat.id, "wins", 5)
+    await message.reply(text, parse_mode=ParseMode.HTML)
+
+
+async def refresh_leaderboard() -> None:
+    # Rankings are recomputed in the database periodically instead of sorting all players for every /leaderboard
+    pool = get_pool()
+    async with timed_acquire(pool) as conn:
+        with DB_QUERY_SECONDS.time("refresh_leaderboard"):
+            await conn.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY leaderboard;")
+
+
+async def get_player_name(user_id: int) -> str:
+    # Only for players without a name stored, i.e. who have not played since names were recorded
+    try:
+        chat = await bot.get_chat(user_id)
+    except TelegramAPIError:
+        return f"Player {user_id}"
+    return chat.full_name
+
+
+@cached()
+async def get_leaderboard_min_games() -> int:
+    # Defined in the database alongside the leaderboard view so the two cannot drift apart
+    pool = get_pool()
+    async with timed_acquire(pool) as conn:
+        with DB_QUERY_SECONDS.time("leaderboard_min_games"):
+            min_games: int = await conn.fetchval("SELECT leaderboard_min_games();")
+    return min_games
+
+
+@cached(ttl=LEADERBOARD_CACHE_SECONDS)
+async def get_leaderboard_text(group_id: int, category: str, limit: int = 10) -> str:
+    # Lines of top players of a group (all groups if group_id is 0) ranked by a category
+    pool = get_pool()
+    async with timed_acquire(pool) as conn:
+        with DB_QUERY_SECONDS.time("leaderboard"):
+            res = await conn.fetch(
+                """\
+                SELECT user_id, score, name
+                    FROM leaderboard
+                    WHERE group_id = $1 AND category = $2 AND rank <= $3
+                    ORDER BY rank;""",
+                group_id,
+                category,
+                limit
+            )
+    if not res:
+        return "No players yet."
+
+    # Plain names instead of mentions, which would notify everyone on the leaderboard
+    unnamed = [r["user_id"] for r in res if r["name"] is None]
+    fetched_names = dict(zip(unnamed, await asyncio.gather(*map(get_player_name, unnamed))))
+    lines = []
+    for i, r in enumerate(res, start=1):
+        name = r["name"] if r["name"] is not None else fetched_names[r["user_id"]]
+        score = f"{r['score']:.0%}" if category == "winrate" else f"{r['score']:.0f}"
+        lines.append(f"{i}. {html.quote(name)} - <b>{score}</b>")
+    return "\n".join(lines)
+
+
+@router.message(Command("leaderboard", "top"))
+async def cmd_leaderboard(message: types.Message, command: CommandObject) -> None:
+    args = command.args.lower().split() if command.args else []
+    if any(a not in LEADERBOARD_CATEGORIES and a != "global" for a in args):
+        await message.reply(
+            "Function: Show the top players of this group, or of all groups with `global`.\n"
+            f"Usage: `/leaderboard [{'|'.join(LEADERBOARD_CATEGORIES)}] [global]`"
         )
-    await message.reply(
-        (
-            f"\U0001f4ca Statistics for <b>{html.quote(message.chat.title)}</b>\n"
-            f"<b>{player_cnt}</b> players\n"
-            f"<b>{game_cnt}</b> games played\n"
-            f"<b>{word_cnt}</b> total words played\n"
-            f"<b>{letter_cnt}</b> total letters played"
-        ),
-        parse_mode=ParseMode.HTML
+        return
+
+    category = next((a for a in args if a in LEADERBOARD_CATEGORIES), "wins")
+    group_id = message.chat.id if message.chat.id < 0 and "global" not in args else 0
+    text = (
+        "\U0001f3c6 Top players "
+        + (f"in <b>{html.quote(message.chat.title or '')}</b>" if group_id else "of all groups")
+        + f" by {LEADERBOARD_CATEGORIES[category]}"
     )
+    if category == "winrate":
+        text += f" (at least {await get_leaderboard_min_games()} games)"
+    text += "\n" + await get_leaderboard_text(group_id, category)
+    text += f"\nUpdated every {LEADERBOARD_REFRESH_SECONDS // 60} minutes."
+    await message.reply(text, parse_mode=ParseMode.HTML)
 
 
 @cached(ttl=5)
@@ -86,17 +198,19 @@ async def get_global_stats() -> str:
     pool = get_pool()
 
     async def get_cnt_1() -> tuple[int, int]:
-        async with pool.acquire() as conn:
-            group_cnt, game_cnt = await conn.fetchrow(
-                "SELECT COUNT(DISTINCT group_id), COUNT(*) FROM game;"
-            )
+        async with timed_acquire(pool) as conn:
+            with DB_QUERY_SECONDS.time("globalstats_game"):
+                group_cnt, game_cnt = await conn.fetchrow(
+                    "SELECT COUNT(DISTINCT group_id), COUNT(*) FROM game;"
+                )
         return group_cnt, game_cnt
 
     async def get_cnt_2() -> tuple[int, int, int]:
-        async with pool.acquire() as conn:
-            player_cnt, word_cnt, letter_cnt = await conn.fetchrow(
-                "SELECT COUNT(*), SUM(word_count), SUM(letter_count) FROM player;"
-            )
+        async with timed_acquire(pool) as conn:
+            with DB_QUERY_SECONDS.time("globalstats_player"):
+                player_cnt, word_cnt, letter_cnt = await conn.fetchrow(
+                    "SELECT COUNT(*), SUM(word_count), SUM(letter_count) FROM player;"
+                )
             return player_cnt, word_cnt, letter_cnt
 
     get_cnt_1_task = asyncio.create_task(get_cnt_1())
@@ -1,36 +1,79 @@
 import asyncio
+import csv
+import io
+import os
+import tempfile
 import time
+from pathlib import Path
+from typing import Optional
 
 from aiogram import Router, types
 from aiogram.enums import ParseMode
 from aiogram.filters import Command, CommandObject
 
-from on9wordchainbot.constants import STAR, WORD_ADDITION_CHANNEL_ID
-from on9wordchainbot.filters import IsOwner
+from on9wordchainbot.constants import DICTIONARIES, STAR, WORD_ADDITION_CHANNEL_ID
+from on9wordchainbot.filters import IsAdmin, IsOwner
 from on9wordchainbot.resources import bot, get_pool
-from on9wordchainbot.utils import awaitable_to_coroutine, check_word_existence, has_star, is_word, send_admin_group
-from on9wordchainbot.words import Words
+from on9wordchainbot.utils import (awaitable_to_coroutine, check_word_existence, check_words, get_group_dictionary_name,
+                                   get_suggestion_text, has_star, is_word, reply_text_or_document, send_admin_group,
+                                   send_groups_only_message)
+from on9wordchainbot.words import default_dictionary
 
 router = Router(name=__name__)
 
+# Statuses of rows in /importwords files -> accepted, including the booleans of /exportwords files
+WORD_STATUSES = {"accept": True, "accepted": True, "t": True, "true": True,
+                 "reject": False, "rejected": False, "f": False, "false": False}
+WORD_IMPORT_MAX_BYTES = 20 << 20  # Largest file bots can download
+
 
 @router.message(Command("exist", "exists"))
-async def cmd_exists(message: types.Message) -> None:
-    word = message.text.partition(" ")[2].lower()
-    if not word or not is_word(word):  # No proper argument given
+async def cmd_exists(message: types.Message, command: CommandObject) -> None:
+    words = list(dict.fromkeys(w for w in (command.args or "").lower().split() if is_word(w)))
+    if not words:  # No proper argument given, check words of the replied message
         rmsg = message.reply_to_message
-        if not rmsg or not rmsg.text or not is_word(rmsg.text.lower()):
+        if rmsg and rmsg.text:
+            words = list(dict.fromkeys(w for w in rmsg.text.lower().split() if is_word(w)))
+        if not words:
             await message.reply(
-                "Function: Check if a word is in my dictionary. "
+                "Function: Check if words are in my dictionary. "
                 "Use /reqaddword if you want to request addition of new words.\n"
-                "Usage: `/exists word`"
+                "Usage: `/exists word1 word2 ...`"
             )
             return
-        word = rmsg.text.lower()
 
-    await message.reply(
-        f"_{word.capitalize()}_ is *{'' if check_word_existence(word) else 'not '}in* my dictionary."
-    )
+    if len(words) == 1:
+        word = words[0]
+        if check_word_existence(word):
+            await message.reply(f"_{word.capitalize()}_ is *in* my dictionary.")
+        else:
+            # Searching words two edits away is limited to SUGGESTION_TIME_BUDGET_SECONDS
+            suggestion_text = get_suggestion_text(word)
+            await message.reply(f"_{word.capitalize()}_ is *not in* my dictionary.{suggestion_text}")
+        return
+
+    existing, absent = default_dictionary.split_words(words)
+    text = ""
+    if existing:
+        text += f"In my dictionary ({len(existing)}): {', '.join(w.capitalize() for w in existing)}\n"
+    if absent:
+        text += f"Not in my dictionary ({len(absent)}): {', '.join(w.capitalize() for w in absent)}\n"
+    await reply_text_or_document(message, text, "exists.txt")
+
+
+def get_unavailable_words_text(existing: list[str], rejected: dict[str, Optional[str]]) -> str:
+    # Lines about words which cannot be added, as they are already in the word list or were rejected
+    text = ""
+    if existing:
+        words = ", ".join(f"_{w.capitalize()}_" for w in existing)
+        text += f"{words} {'is' if len(existing) == 1 else 'are'} already in the word list.\n"
+    if rejected_without_reason := [w for w, reason in rejected.items() if not reason]:
+        words = ", ".join(f"_{w.capitalize()}_" for w in rejected_without_reason)
+        text += f"{words} {'was' if len(rejected_without_reason) == 1 else 'were'} rejected.\n"
+    for word, reason in rejected.items():
+        if reason:
+            text += f"_{word.capitalize()}_ was rejected. Reason: {reason}.\n"
+    return text
 
 
 @router.message(Command("reqaddword", "reqaddwords"))
@@ -39,7 +82,7 @@ async def cmd_reqaddword(message: types.Message, command: CommandObject) -> None
         return
 
     args = command.args
-    if args and (words_to_add := [w for w in set(args.lower().split()) if is_word(w)]):
+    if args and (words := [w for w in args.lower().split() if is_word(w)]):
         pass  # ok
     else:
         await message.reply(
@@ -55,26 +98,7 @@ async def cmd_reqaddword(message: types.Message, command: CommandObject) -> None
         )
         return
 
-    existing = []
-    rejected = []
-    rejected_with_reason = []
-    for w in words_to_add[:]:  # Iterate through a copy so removal of elements is possible
-        if check_word_existence(w):
-            existing.append(f"_{w.capitalize()}_")
-            words_to_add.remove(w)
-
-    pool = get_pool()
-    async with pool.acquire() as conn:
-        rej = await conn.fetch("SELECT word, reason FROM wordlist WHERE NOT accepted;")
-    for word, reason in rej:
-        if word not in words_to_add:
-            continue
-        words_to_add.remove(word)
-        word = f"_{word.capitalize()}_"
-        if reason:
-            rejected_with_reason.append((word, reason))
-        else:
-            rejected.append(word)
+    existing, words_to_add, rejected = await check_words(words)
 
     text = ""
     if words_to_add:
@@ -95,66 +119,40 @@ async def cmd_reqaddword(message: types.Message, command: CommandObject) -> None
                 parse_mode=ParseMode.HTML
             )
         )
-    if existing:
-        text += f"{', '.join(existing)} {'is' if len(existing) == 1 else 'are'} already in the word list.\n"
-    if rejected:
-        text += f"{', '.join(rejected)} {'was' if len(rejected) == 1 else 'were'} rejected.\n"
-    for word, reason in rejected_with_reason:
-        text += f"{word} was rejected. Reason: {reason}.\n"
-    await message.reply(text)
+    text += get_unavailable_words_text(existing, rejected)
+    await reply_text_or_document(message, text, "reqaddword.txt")
 
 
 @router.message(IsOwner(), Command("addword", "addwords"))
 async def cmd_addwords(message: types.Message, command: CommandObject) -> None:
     args = command.args
-    if args and (words_to_add := [w for w in set(args.lower().split()) if is_word(w)]):
+    if args and (words := [w for w in args.lower().split() if is_word(w)]):
         pass  # ok
     else:
         await message.reply("where words")
         return
 
-    existing = []
-    rejected = []
-    rejected_with_reason = []
-    for w in words_to_add[:]:  # Cannot iterate while deleting
-        if check_word_existence(w):
-            existing.append(f"_{w.capitalize()}_")
-            words_to_add.remove(w)
-
-    pool = get_pool()
-    async with pool.acquire() as conn:
-        rej = await conn.fetch("SELECT word, reason FROM wordlist WHERE NOT accepted;")
-    for word, reason in rej:
-        if word not in words_to_add:
-            continue
-        words_to_add.remove(word)
-        word = f"_{word.capitalize()}_"
-        if reason:
-            rejected_with_reason.append((word, reason))
-        else:
-            rejected.append(word)
+    existing, words_to_add, rejected = await check_words(words)
 
     text = ""
     if words_to_add:
+        pool = get_pool()
         async with pool.acquire() as conn:
             await conn.copy_records_to_table("wordlist", records=[(w, True, None) for w in words_to_add])
         text += f"Added {', '.join([f'_{w.capitalize()}_' for w in words_to_add])} to the word list.\n"
-    if existing:
-        text += f"{', '.join(existing)} {'is' if len(existing) == 1 else 'are'} already in the word list.\n"
-    if rejected:
-        text += f"{', '.join(rejected)} {'was' if len(rejected) == 1 else 'were'} rejected.\n"
-    for word, reason in rejected_with_reason:
-        text += f"{word} was rejected. Reason: {reason}.\n"
-    msg = await message.reply(text)
+    text += get_unavailable_words_text(existing, rejected)
+    msg = await reply_text_or_document(message, text, "addwords.txt")
 
     if not words_to_add:
         return
 
     t = time.time()
-    await Words.update()
-    asyncio.create_task(
-        awaitable_to_coroutine(msg.edit_text(msg.md_text + f"\n\nWord list updated. Time taken: `{time.time() - t:.3f}s`"))
-    )
+    await default_dictionary.update()
+    update_text = f"Word list updated. Time taken: `{time.time() - t:.3f}s`"
+    if msg.text:
+        asyncio.create_task(awaitable_to_coroutine(msg.edit_text(msg.md_text + "\n\n" + update_text)))
+    else:  # Sent as a file
+        asyncio.create_task(awaitable_to_coroutine(msg.reply(update_text)))
     asyncio.create_task(
         bot.send_message(
             WORD_ADDITION_CHANNEL_ID,
@@ -194,3 +192,151 @@ async def cmd_rejword(message: types.Message, command: CommandObject) -> None:
         await message.reply(f"_{word}_ was already rejected.")
     else:
         await message.reply(f"_{word}_ was already rejected. Reason: {r['reason']}.")
+
+
+def parse_word_rows(text: str) -> tuple[dict[str, tuple[bool, Optional[str]]], list[tuple[int, str, str]]]:
+    # Word -> (accepted, reason) from CSV rows of `word[,status[,reason]]`, where the last row of a word takes effect,
+    # and invalid rows as (line number, row, error).
+    # Words without a status are accepted, so a plain word list can be imported too.
+    records: dict[str, tuple[bool, Optional[str]]] = {}
+    invalid: list[tuple[int, str, str]] = []
+    reader = csv.reader(io.StringIO(text))
+    for row in reader:
+        if not row or not row[0].strip():
+            continue
+        word = row[0].strip().lower()
+        if reader.line_num == 1 and word == "word":  # Header of exported files
+            continue
+        status = row[1].strip().lower() if len(row) > 1 and row[1].strip() else "accept"
+        if not is_word(word):
+            invalid.append((reader.line_num, ",".join(row), "not a word"))
+        elif status not in WORD_STATUSES:
+            invalid.append((reader.line_num, ",".join(row), f"unknown status {status}"))
+        else:
+            accepted = WORD_STATUSES[status]
+            reason = row[2].strip() if len(row) > 2 and not accepted else ""
+            records[word] = (accepted, reason or None)
+    return records, invalid
+
+
+@router.message(IsOwner(), Command("importwords"))
+async def cmd_importwords(message: types.Message) -> None:
+    # The document is sent with the command as caption or replied to
+    rmsg = message.reply_to_message
+    document = message.document or (rmsg.document if rmsg else None)
+    if not document:
+        await message.reply(
+            "Function: Accept and reject words in bulk.\n"
+            "Usage: Send or reply to a CSV file with `/importwords`. "
+            "Each row is `word`, `word,accept` or `word,reject,reason`. Files from /exportwords can be imported."
+        )
+        return
+    if document.file_size and document.file_size > WORD_IMPORT_MAX_BYTES:
+        await message.reply(f"The file is too large. Files up to {WORD_IMPORT_MAX_BYTES >> 20} MB are supported.")
+        return
+
+    data = io.BytesIO()
+    await bot.download(document, data)
+    try:
+        text = data.getvalue().decode("utf-8-sig")
+    except UnicodeDecodeError:
+        await message.reply("The file must be encoded in UTF-8.")
+        return
+    records, invalid = parse_word_rows(text)
+    if not records:
+        await message.reply(f"No words to import. Invalid rows: {len(invalid)}.")
+        return
+
+    # Imported words replace their existing rows in one transaction,
+    # so the word list is never seen half imported
+    pool = get_pool()
+    async with pool.acquire() as conn, conn.transaction():
+        await conn.execute("CREATE TEMPORARY TABLE wordlist_import (LIKE wordlist) ON COMMIT DROP;")
+        await conn.copy_records_to_table(
+            "wordlist_import", records=[(w, accepted, reason) for w, (accepted, reason) in records.items()]
+        )
+        rows = await conn.fetch(
+            "SELECT word, accepted, reason FROM wordlist WHERE word IN (SELECT word FROM wordlist_import);"
+        )
+        await conn.execute("DELETE FROM wordlist WHERE word IN (SELECT word FROM wordlist_import);")
+        await conn.execute("INSERT INTO wordlist SELECT * FROM wordlist_import;")
+    previous = {row["word"]: (row["accepted"], row["reason"]) for row in rows}
+
+    results = {"added": 0, "changed": 0, "unchanged": 0}
+    summary = io.StringIO()
+    writer = csv.writer(summary)
+    writer.writerow(("word", "accepted", "reason", "result"))
+    for word, record in records.items():
+        result = "added" if word not in previous else "unchanged" if previous[word] == record else "changed"
+        results[result] += 1
+        writer.writerow((word, record[0], record[1] or "", result))
+    for line_num, row, error in invalid:
+        writer.writerow((row, "", "", f"invalid (line {line_num}): {error}"))
+
+    text = (
+        f"Imported {len(records)} words: {results['added']} added, {results['changed']} changed, "
+        f"{results['unchanged']} unchanged. Invalid rows: {len(invalid)}."
+    )
+    if results["added"] or results["changed"]:
+        # Once for the whole file
+        t = time.time()
+        await default_dictionary.update()
+        text += f"\nWord list updated. Time taken: `{time.time() - t:.3f}s`"
+    await message.reply_document(
+        types.BufferedInputFile(summary.getvalue().encode(), "import_summary.csv"), caption=text
+    )
+
+
+@router.message(IsOwner(), Command("exportwords"))
+async def cmd_exportwords(message: types.Message) -> None:
+    # Written to a temporary file by COPY and uploaded from disk, without loading the table into memory
+    fd, filename = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    path = Path(filename)
+    try:
+        pool = get_pool()
+        async with pool.acquire() as conn:
+            await conn.copy_from_query(
+                "SELECT word, accepted, reason FROM wordlist ORDER BY word", output=path, format="csv", header=True
+            )
+        await message.reply_document(types.FSInputFile(path, "wordlist.csv"))
+    finally:
+        path.unlink()
+
+
+@router.message(Command("dictionary"))
+@send_groups_only_message
+async def cmd_dictionary(message: types.Message, command: CommandObject) -> None:
+    # Dictionary used by games of the group, changes take effect from the next game
+    arg = command.args.strip() if command.args else None
+    available = ", ".join(f"`{d}`" for d in DICTIONARIES)
+    if not arg:
+        # Only the name, without loading the dictionary
+        current_name = await get_group_dictionary_name(message.chat.id)
+        await message.reply(
+            f"This group uses the `{current_name}` dictionary.\n"
+            f"Available dictionaries: {available}\n"
+            "Group admins can change it with `/dictionary name`."
+        )
+        return
+
+    # Names are matched case-insensitively but stored as configured
+    name = next((d for d in DICTIONARIES if d.lower() == arg.lower()), None)
+    if name is None:
+        await message.reply(f"Unknown dictionary. Available dictionaries: {available}")
+        return
+    if not await IsAdmin()(message):
+        await message.reply("Only group admins can change the dictionary.")
+        return
+
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """\
+            INSERT INTO groupdictionary (group_id, dictionary)
+            VALUES ($1, $2)
+            ON CONFLICT (group_id) DO UPDATE SET dictionary = excluded.dictionary;""",
+            message.chat.id,
+            name
+        )
+    await message.reply(f"This group now uses the `{name}` dictionary from the next game.")
@@ -0,0 +1,163 @@
+import logging
+import time
+from bisect import bisect_left
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, Optional, Union
+
+import asyncpg
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Prometheus text exposition format, served on a local port for scraping
+# https://prometheus.io/docs/instrumenting/exposition_formats/
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (1, 4, 16, 64, 256, 1024, 4096, 16384, 65536, 262144)
+
+LabelValues = tuple[str, ...]
+
+
+class Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        REGISTRY.append(self)
+
+    def format_labels(self, values: LabelValues, extra: Optional[tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labels, values))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labels)
+        self.values: dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for label_values, value in self.values.items():
+            lines.append(f"{self.name}{self.format_labels(label_values)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def set(self, value: float, *label_values: str) -> None:
+        self.values[label_values] = value
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[Union[int, float], ...] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+        # Label values -> (non-cumulative bucket counts with +Inf bucket last, sum)
+        self.values: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        if label_values not in self.values:
+            self.values[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = self.values[label_values]
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    @contextmanager
+    def time(self, *label_values: str) -> Iterator[None]:
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t, *label_values)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for label_values, (counts, total) in self.values.items():
+            cumulative = 0
+            for le, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{self.format_labels(label_values, ('le', str(le)))} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{self.format_labels(label_values)} {total[0]}")
+            lines.append(f"{self.name}_count{self.format_labels(label_values)} {cumulative}")
+        return lines
+
+
+REGISTRY: list[Metric] = []
+
+GAME_TICK_LAG = Histogram(
+    "on9wcb_game_tick_lag_seconds", "Delay of game loop ticks beyond their 1s interval", ("game_mode",)
+)
+HANDLE_ANSWER_SECONDS = Histogram(
+    "on9wcb_handle_answer_seconds", "Time taken to handle an answer", ("game_mode",)
+)
+SEND_MESSAGE_SECONDS = Histogram("on9wcb_send_message_seconds", "Latency of game send_message calls")
+RETRY_AFTER_TOTAL = Counter("on9wcb_retry_after_total", "Flood control errors received from Telegram")
+DB_ACQUIRE_SECONDS = Histogram("on9wcb_db_acquire_seconds", "Time waited to acquire a database connection")
+DB_QUERY_SECONDS = Histogram("on9wcb_db_query_seconds", "Time taken by database queries", ("statement",))
+WORDS_UPDATE_SECONDS = Histogram(
+    "on9wcb_words_update_seconds", "Time taken to rebuild the dictionary", buckets=(1, 2.5, 5, 10, 30, 60, 120)
+)
+FILTER_WORDS_CANDIDATES = Histogram(
+    "on9wcb_filter_words_candidates", "Number of candidate words scanned by filter_words", buckets=SIZE_BUCKETS
+)
+EVENT_LOOP_LAG = Histogram("on9wcb_event_loop_lag_seconds", "Event loop scheduling delay")
+GAMES = Gauge("on9wcb_games", "Number of games", ("state",))
+
+
+@asynccontextmanager
+async def timed_acquire(pool: asyncpg.pool.Pool) -> AsyncIterator[asyncpg.pool.PoolConnectionProxy]:
+    # Drop-in replacement for pool.acquire() recording the wait for a free connection
+    t = time.perf_counter()
+    async with pool.acquire() as conn:
+        DB_ACQUIRE_SECONDS.observe(time.perf_counter() - t)
+        yield conn
+
+
+def render() -> str:
+    # Prevent circular imports
+    from on9wordchainbot.constants import GameState
+    from on9wordchainbot.resources import GlobalState
+
+    states = [g.state for g in GlobalState.games.values()]
+    GAMES.set(states.count(GameState.JOINING), "joining")
+    GAMES.set(states.count(GameState.RUNNING), "running")
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    return web.Response(text=render(), content_type="text/plain", charset="utf-8")
+
+
+async def start_metrics_server(port: int) -> web.AppRunner:
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    logger.info(f"Serving metrics on http://127.0.0.1:{port}/metrics")
+    return runner
@@ -0,0 +1,26 @@
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.middlewares.user_context import EVENT_CHAT_KEY
+from aiogram.types import TelegramObject
+
+from on9wordchainbot.resources import GlobalState
+
+
+class ChatLockMiddleware(BaseMiddleware):
+    # Handle game updates of a group with a game one at a time and never during a game loop tick,
+    # so that answers, commands and the timer cannot change the game concurrently.
+    # Registered as an inner middleware of the gameplay router, so it only applies to handlers that matched,
+    # i.e. answers and game commands. Updates of different chats are still handled in parallel.
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any]
+    ) -> Any:
+        chat = data.get(EVENT_CHAT_KEY)
+        if chat is None or chat.id not in GlobalState.games:
+            return await handler(event, data)
+        async with GlobalState.chat_locks.hold(chat.id):
+            return await handler(event, data)
@@ -1,13 +1,16 @@
+import logging
 import random
 from datetime import datetime
-from string import ascii_lowercase
-from typing import Optional
+from typing import Any
 
 from aiogram import types
 from aiogram.enums import ParseMode
 
 from on9wordchainbot.models.game.classic import ClassicGame
 from on9wordchainbot.utils import get_random_word
+from on9wordchainbot.words import LETTER_BITS, Dictionary, default_dictionary
+
+logger = logging.getLogger(__name__)
 
 
 class BannedLettersGame(ClassicGame):
@@ -16,8 +19,8 @@ class BannedLettersGame(ClassicGame):
 
     __slots__ = ("banned_letters",)
 
-    def __init__(self, group_id: int) -> None:
-        super().__init__(group_id)
+    def __init__(self, group_id: int, dictionary: Dictionary = default_dictionary) -> None:
+        super().__init__(group_id, dictionary)
         self.banned_letters: list[str] = []
 
     async def send_turn_message(self) -> None:
@@ -30,7 +33,8 @@ class BannedLettersGame(ClassicGame):
                 f"letter{'' if self.min_letters_limit == 1 else 's'}</b>.\n"
                 f"You have <b>{self.time_limit}s</b> to answer.\n"
                 f"Players remaining: {len(self.players_in_game)}/{len(self.players)}\n"
-                f"Total words: {self.turns}"
+                f"Total words: {self.turns}\n"
+                f"Possible answers: {self.count_remaining_answers()}"
             ),
             parse_mode=ParseMode.HTML
         )
@@ -43,13 +47,8 @@ class BannedLettersGame(ClassicGame):
         if self.players_in_game[0].is_vp:
             await self.vp_answer()
 
-    def get_random_valid_answer(self) -> Optional[str]:
-        return get_random_word(
-            min_len=self.min_letters_limit,
-            prefix=self.current_word[-1],
-            banned_letters=self.banned_letters,
-            exclude_words=self.used_words
-        )
+    def get_answer_constraints(self) -> dict[str, Any]:
+        return {**super().get_answer_constraints(), "banned_letters": self.banned_letters}
 
     async def additional_answer_checkers(self, word: str, message: types.Message) -> bool:
         used_banned_letters = sorted(set(word) & set(self.banned_letters))
@@ -66,23 +65,56 @@ class BannedLettersGame(ClassicGame):
 
         # Set banned letters (maximum one vowel)
         if self.current_word:  # Mixed Elimination
-            alphabets = sorted(set(ascii_lowercase) - {self.current_word[-1]})
+            alphabets = [c for c in self.dictionary.alphabet if c != self.current_word[-1]]
         else:
-            alphabets = list(ascii_lowercase)
+            alphabets = list(self.dictionary.alphabet)
         for _ in range(random.randint(2, 4)):
-            self.banned_letters.append(random.choice(alphabets))
+            # Also called with mixed elimination games
+            allowed = BannedLettersGame.get_bannable_letters(self, alphabets)
+            if not allowed:
+                if len(self.banned_letters) >= 2 or not alphabets:
+                    break
+                logger.warning(
+                    f"No letter can be banned along with {self.banned_letters} in dictionary "
+                    f"{self.dictionary.name} without leaving a starting letter without answers"
+                )
+                allowed = alphabets
+            self.banned_letters.append(random.choice(allowed))
             if self.banned_letters[-1] in "aeiou":
                 alphabets = [c for c in alphabets if c not in "aeiou"]
             else:
                 alphabets.remove(self.banned_letters[-1])
         self.banned_letters.sort()
 
+    def get_bannable_letters(self, letters: list[str]) -> list[str]:
+        # Letters which can be banned along with the banned letters without making a starting letter a dead end.
+        # Banning a letter in every remaining word of a starting letter makes it a dead end,
+        # so those letters are found with one pass over the words instead of checking every letter.
+        unsafe: set[str] = set()
+        for c in self.dictionary.first_letters:
+            if c not in self.banned_letters:
+                unsafe |= self.dictionary.common_letters(c, self.min_letters_limit, self.banned_letters) - {c}
+        return [
+            c for c in letters
+            if c not in unsafe
+            # Letter masks only cover a-z
+            and (c in LETTER_BITS or not BannedLettersGame.get_dead_end_letters(self, self.banned_letters + [c]))
+        ]
+
+    def get_dead_end_letters(self, banned_letters: list[str]) -> list[str]:
+        # Starting letters with words in the dictionary but none without banned letters
+        return [
+            c for c in self.dictionary.first_letters
+            if c not in banned_letters and self.dictionary.count_words(c, self.min_letters_limit)
+            and not self.dictionary.has_words(c, self.min_letters_limit, banned_letters=banned_letters)
+        ]
+
     async def running_initialization(self) -> None:
         self.set_banned_letters()
 
         # Random starting word
         self.current_word = get_random_word(
-            min_len=self.min_letters_limit, banned_letters=self.banned_letters
+            min_len=self.min_letters_limit, banned_letters=self.banned_letters, dictionary=self.dictionary
         )
         self.used_words.add(self.current_word)
         self.start_time = datetime.now().replace(microsecond=0)
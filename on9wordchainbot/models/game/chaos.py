@@ -19,7 +19,8 @@ class ChaosGame(ClassicGame):
                 f"contain <b>at least {self.min_letters_limit} letters</b>.\n"
                 f"You have <b>{self.time_limit}s</b> to answer.\n"
                 f"Players remaining: {len(self.players_in_game)}/{len(self.players)}\n"
-                f"Total words: {self.turns}"
+                f"Total words: {self.turns}\n"
+                f"Possible answers: {self.count_remaining_answers()}"
             ),
             parse_mode=ParseMode.HTML
         )
@@ -34,7 +35,7 @@ class ChaosGame(ClassicGame):
 
     async def running_initialization(self) -> None:
         # Random starting word
-        self.current_word = get_random_word(min_len=self.min_letters_limit)
+        self.current_word = get_random_word(min_len=self.min_letters_limit, dictionary=self.dictionary)
         self.used_words.add(self.current_word)
         self.start_time = datetime.now().replace(microsecond=0)
 
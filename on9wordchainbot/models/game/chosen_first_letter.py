@@ -1,20 +1,30 @@
 import random
 from datetime import datetime
-from string import ascii_lowercase
+from typing import Any, Optional
 
 from aiogram.enums import ParseMode
 
 from on9wordchainbot.models.game.classic import ClassicGame
+from on9wordchainbot.words import Dictionary
 
 
 class ChosenFirstLetterGame(ClassicGame):
     name = "chosen first letter game"
     command = "startcfl"
 
+    def get_next_answer_constraints(self, last_letter: str) -> Optional[dict[str, Any]]:
+        return None  # The chosen first letter never changes
+
+    @staticmethod
+    def get_possible_letters(dictionary: Dictionary, min_len: int = 1) -> str:
+        # Letters which words with at least min_len letters start with.
+        # Not empty if the dictionary has such words, which is checked before starting a game.
+        return "".join(c for c in dictionary.first_letters if dictionary.count_words(c, min_len))
+
     async def running_initialization(self) -> None:
         # Instead of storing the last used word like in other game modes,
         # self.current_word stores in the chosen first letter which is constant throughout the game
-        self.current_word = random.choice(ascii_lowercase)
+        self.current_word = random.choice(self.get_possible_letters(self.dictionary, self.min_letters_limit))
         self.start_time = datetime.now().replace(microsecond=0)
 
         await self.send_message(
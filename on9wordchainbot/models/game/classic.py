@@ -6,16 +6,22 @@ from typing import Any, Optional
 from aiocache import cached
 from aiogram import types
 from aiogram.enums import ParseMode
-from aiogram.exceptions import TelegramBadRequest
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
 from aiogram.utils.chat_member import ADMINS, MEMBERS
 
-from on9wordchainbot.resources import GlobalState, bot, on9bot, get_pool
+from on9wordchainbot.resources import GlobalState, bot, on9bot, get_pool, vp_bots
+from on9wordchainbot.metrics import (DB_QUERY_SECONDS, GAME_TICK_LAG, RETRY_AFTER_TOTAL, SEND_MESSAGE_SECONDS,
+                                     timed_acquire)
 from on9wordchainbot.models.player import Player
-from on9wordchainbot.constants import GameSettings, GameState, OWNER_ID
+from on9wordchainbot.models.vp_strategy import DEFAULT_DIFFICULTY, choose_vp_answer
+from on9wordchainbot.ranks import rank_service
+from on9wordchainbot.constants import REMAINING_ANSWERS_CACHE_SIZE, GameSettings, GameState, OWNER_ID
+from on9wordchainbot.words import Dictionary, WordSet, default_dictionary, word_matches
 from on9wordchainbot.utils import (
     ADD_ON9BOT_TO_GROUP_KEYBOARD,
     check_word_existence,
     get_random_word,
+    get_suggestion_text,
     send_admin_group,
 )
 
@@ -25,14 +31,16 @@ class ClassicGame:
     command = "startclassic"
 
     __slots__ = (
-        "group_id", "players", "players_in_game", "state", "start_time", "end_time",
+        "group_id", "dictionary", "players", "players_in_game", "state", "start_time", "end_time",
         "extended_user_ids", "min_players", "max_players", "time_left", "time_limit",
         "min_letters_limit", "current_word", "longest_word", "longest_word_sender_id",
-        "answered", "accepting_answers", "turns", "used_words", "join_lock"
+        "answered", "accepting_answers", "turns", "used_words", "remaining_answers", "remaining_answers_words",
+        "vp_difficulties", "join_lock"
     )
 
-    def __init__(self, group_id: int) -> None:
+    def __init__(self, group_id: int, dictionary: Dictionary = default_dictionary) -> None:
         self.group_id = group_id
+        self.dictionary = dictionary
         self.players: list[Player] = []
         self.players_in_game: list[Player] = []
         self.state = GameState.JOINING
@@ -55,7 +63,11 @@ class ClassicGame:
         self.answered = False
         self.accepting_answers = False
         self.turns = 0
-        self.used_words: set[str] = set()
+        self.used_words = WordSet(dictionary)
+        # Answer constraints key -> number of unused valid answers, counted once and decremented as words are used
+        self.remaining_answers: dict[tuple[Any, ...], int] = {}
+        self.remaining_answers_words = dictionary.words  # Counted with this word list, recounted after updates
+        self.vp_difficulties: dict[int, str] = {}  # VP user id -> difficulty
 
         self.join_lock = asyncio.Lock()  # Prevent same user / vp joining as multiple players
 
@@ -63,7 +75,12 @@ class ClassicGame:
         return any(p.user_id == user_id for p in self.players)
 
     async def send_message(self, *args: Any, **kwargs: Any) -> types.Message:
-        return await bot.send_message(self.group_id, *args, **kwargs)
+        try:
+            with SEND_MESSAGE_SECONDS.time():
+                return await bot.send_message(self.group_id, *args, **kwargs)
+        except TelegramRetryAfter:
+            RETRY_AFTER_TOTAL.inc()
+            raise
 
     @cached(ttl=15)
     async def is_admin(self, user_id: int) -> bool:
@@ -175,13 +192,14 @@ class ClassicGame:
                 parse_mode=ParseMode.HTML
             )
 
-    async def addvp(self, message: types.Message) -> None:
+    async def addvp(self, message: types.Message, difficulty: str = DEFAULT_DIFFICULTY) -> None:
         async with self.join_lock:
             if self.state != GameState.JOINING or len(self.players) >= self.max_players:
                 return
 
-            # Check if On9Bot already joined
-            if any(p.is_vp for p in self.players):
+            # Check if all VPs already joined
+            free_vp_bots = [b for b in vp_bots.values() if not self.user_in_game(b.id)]
+            if not free_vp_bots:
                 return
 
             # Check if vp adder is player/admin/owner
@@ -193,39 +211,49 @@ class ClassicGame:
                 await self.send_message("Imagine not playing")
                 return
 
-            try:
-                vp_member = await bot.get_chat_member(self.group_id, on9bot.id)
-                assert isinstance(vp_member, MEMBERS)  # VP must be chat member
-            except (TelegramBadRequest, AssertionError):
+            # Use the first VP which is a chat member
+            for vp_bot in free_vp_bots:
+                try:
+                    vp_member = await bot.get_chat_member(self.group_id, vp_bot.id)
+                except TelegramBadRequest:
+                    continue
+                if isinstance(vp_member, MEMBERS):
+                    break
+            else:
+                vp_bot = free_vp_bots[0]
+                vp_user = await vp_bot.me()
                 await self.send_message(
-                    f"Add [On9Bot](tg://user?id={on9bot.id}) here to play as a virtual player.",
-                    reply_markup=ADD_ON9BOT_TO_GROUP_KEYBOARD
+                    f"Add [{vp_user.full_name}](tg://user?id={vp_bot.id}) here to play as a virtual player.",
+                    reply_markup=ADD_ON9BOT_TO_GROUP_KEYBOARD if vp_bot is on9bot else None
                 )
                 return
 
-            vp = await Player.vp()
+            vp = await Player.vp(vp_bot)
             self.players.append(vp)
+            self.vp_difficulties[vp.user_id] = difficulty
+            player_cnt = len(self.players)
 
-            bot_user = await bot.me()
-            await on9bot.send_message(self.group_id, "/join@" + bot_user.username)
-            await self.send_message(
-                (
-                    f"{vp.name} joined. There {'is' if len(self.players) == 1 else 'are'} now "
-                    f"{len(self.players)} player{'' if len(self.players) == 1 else 's'}."
-                ),
-                parse_mode=ParseMode.HTML
-            )
+        # Sent without the join lock, which must not be held while the chat lock is released for the rate limit
+        bot_user = await bot.me()
+        await self.send_vp_message(vp, "/join@" + bot_user.username)
+        await self.send_message(
+            (
+                f"{vp.name} joined. There {'is' if player_cnt == 1 else 'are'} now "
+                f"{player_cnt} player{'' if player_cnt == 1 else 's'}."
+            ),
+            parse_mode=ParseMode.HTML
+        )
 
-            # Start game when max players reached
-            if len(self.players) >= self.max_players:
-                self.time_left = -99999
+        # Start game when max players reached
+        if self.state == GameState.JOINING and len(self.players) >= self.max_players:
+            self.time_left = -99999
 
     async def remvp(self, message: types.Message) -> None:
         async with self.join_lock:
             if self.state != GameState.JOINING:
                 return
 
-            # Check if On9Bot has joined
+            # Check if any VP has joined
             if not any(p.is_vp for p in self.players):
                 return
 
@@ -238,22 +266,25 @@ class ClassicGame:
                 await self.send_message("Imagine not playing")
                 return
 
-            for i in range(len(self.players)):
+            # Remove the last VP to join
+            for i in reversed(range(len(self.players))):
                 if self.players[i].is_vp:
                     vp = self.players.pop(i)
                     break
             else:
                 return
+            player_cnt = len(self.players)
 
-            bot_user = await bot.me()
-            await on9bot.send_message(self.group_id, "/flee@" + bot_user.username)
-            await self.send_message(
-                (
-                    f"{vp.name} fled. There {'is' if len(self.players) == 1 else 'are'} now "
-                    f"{len(self.players)} player{'' if len(self.players) == 1 else 's'}."
-                ),
-                parse_mode=ParseMode.HTML
-            )
+        # Sent without the join lock like in addvp
+        bot_user = await bot.me()
+        await self.send_vp_message(vp, "/flee@" + bot_user.username)
+        await self.send_message(
+            (
+                f"{vp.name} fled. There {'is' if player_cnt == 1 else 'are'} now "
+                f"{player_cnt} player{'' if player_cnt == 1 else 's'}."
+            ),
+            parse_mode=ParseMode.HTML
+        )
 
     async def extend(self, message: types.Message) -> None:
         if self.state != GameState.JOINING:
@@ -321,7 +352,8 @@ class ClassicGame:
                 f"include <b>at least {self.min_letters_limit} letters</b>.\n"
                 f"You have <b>{self.time_limit}s</b> to answer.\n"
                 f"Players remaining: {len(self.players_in_game)}/{len(self.players)}\n"
-                f"Total words: {self.turns}"
+                f"Total words: {self.turns}\n"
+                f"Possible answers: {self.count_remaining_answers()}"
             ),
             parse_mode=ParseMode.HTML
         )
@@ -334,30 +366,96 @@ class ClassicGame:
         if self.players_in_game[0].is_vp:
             await self.vp_answer()
 
+    def get_answer_constraints(self) -> dict[str, Any]:
+        # Keyword arguments of get_random_word for valid answers, apart from used words
+        # To be overridden by other game modes
+        return {"min_len": self.min_letters_limit, "prefix": self.current_word[-1]}
+
+    def get_next_answer_constraints(self, last_letter: str) -> Optional[dict[str, Any]]:
+        # Constraints for the next player if an answer ending with last_letter is accepted,
+        # None if they do not depend on the answer
+        return {**self.get_answer_constraints(), "prefix": last_letter}
+
     def get_random_valid_answer(self) -> Optional[str]:
         return get_random_word(
-            min_len=self.min_letters_limit,
-            prefix=self.current_word[-1],
-            exclude_words=self.used_words
+            **self.get_answer_constraints(), exclude_words=self.used_words, dictionary=self.dictionary
         )
 
+    def get_answer_constraints_key(self) -> tuple[Any, ...]:
+        # Hashable copy of answer constraints (banned letters are changed in place)
+        return tuple((k, tuple(v) if isinstance(v, list) else v) for k, v in self.get_answer_constraints().items())
+
+    def count_remaining_answers(self) -> int:
+        if self.remaining_answers_words is not self.dictionary.words:  # Dictionary updated
+            self.remaining_answers.clear()
+            self.remaining_answers_words = self.dictionary.words
+
+        key = self.get_answer_constraints_key()
+        if key not in self.remaining_answers:
+            if len(self.remaining_answers) >= REMAINING_ANSWERS_CACHE_SIZE:
+                del self.remaining_answers[next(iter(self.remaining_answers))]  # Oldest
+            # Start from the precomputed counts for constraints not seen yet
+            self.remaining_answers[key] = self.dictionary.count_words(
+                **self.get_answer_constraints(), exclude_words=self.used_words
+            )
+        return self.remaining_answers[key]
+
+    async def wait_vp_rate_limit(self, vp: Player) -> None:
+        # Limits are shared by all games, so several VPs cannot flood a group and many games cannot flood a VP bot.
+        # Waited for with the chat lock released so that other updates of the group and game loop ticks are handled.
+        async with GlobalState.chat_locks.released(self.group_id):
+            await GlobalState.vp_chat_rate_limiter.wait(self.group_id)
+            await GlobalState.vp_bot_rate_limiter.wait(vp.user_id)
+
+    async def send_vp_message(self, vp: Player, text: str, reserved: bool = False) -> None:
+        # reserved: wait_vp_rate_limit was already called for this message
+        # Must not be called with the join lock held
+        if not reserved:
+            await self.wait_vp_rate_limit(vp)
+        await vp_bots[vp.user_id].send_message(self.group_id, text)
+
     async def vp_answer(self) -> None:
-        # Wait before answering to prevent exceeding 20 msg/min message limit
-        # Also simulate thinking/input time like human players, wowzers
-        await asyncio.sleep(random.uniform(5, 8))
+        vp = self.players_in_game[0]
+
+        # Simulate thinking/input time like human players, wowzers
+        # Other updates of the group are handled meanwhile, so check if it is still the turn of the VP
+        async with GlobalState.chat_locks.released(self.group_id):
+            await asyncio.sleep(random.uniform(5, 8))
+            await self.wait_vp_rate_limit(vp)  # For the answer below, before checking the turn
+        if (
+            self.state != GameState.RUNNING
+            or self.answered
+            or not self.accepting_answers
+            or not self.players_in_game
+            or self.players_in_game[0] is not vp
+        ):
+            return
 
-        word = self.get_random_valid_answer()
+        difficulty = self.vp_difficulties.get(vp.user_id, DEFAULT_DIFFICULTY)
+        word = choose_vp_answer(self, difficulty, GameSettings.VP_MOVE_CPU_BUDGET_SECONDS)
 
         if not word:  # No valid words to choose from
-            await on9bot.send_message(self.group_id, "/forceskip bey")
+            await self.send_vp_message(vp, "/forceskip bey", reserved=True)
             self.time_left = 0
             return
 
-        await on9bot.send_message(self.group_id, word.capitalize())
+        await self.send_vp_message(vp, word.capitalize(), reserved=True)
 
         self.post_turn_processing(word)
         await self.send_post_turn_message(word)
 
+    def is_answer(self, message: types.Message) -> bool:
+        # Whether a message is an answer of the current player, before checking the word.
+        # Most messages in a group with a game are not answers, so this is kept cheap.
+        return bool(
+            self.accepting_answers
+            and not self.answered
+            and self.players_in_game
+            and message.from_user.id == self.players_in_game[0].user_id
+            and message.text is not None
+            and self.dictionary.answer_pattern.match(message.text)
+        )
+
     async def additional_answer_checkers(self, word: str, message: types.Message) -> bool:
         # To be overridden by other game modes
         # True/False: valid/invalid answer
@@ -384,8 +482,10 @@ class ClassicGame:
         if word in self.used_words:
             await message.reply(f"_{word.capitalize()}_ has been used.")
             return
-        if not check_word_existence(word):
-            await message.reply(f"_{word.capitalize()}_ is not in my list of words.")
+        if not check_word_existence(word, self.dictionary):
+            # Only words one edit away, which are found quickly
+            suggestion_text = get_suggestion_text(word, self.dictionary, max_distance=1)
+            await message.reply(f"_{word.capitalize()}_ is not in my list of words.{suggestion_text}")
             return
         if not await self.additional_answer_checkers(word, message):
             return
@@ -398,6 +498,13 @@ class ClassicGame:
         from on9wordchainbot.models.game.chosen_first_letter import ChosenFirstLetterGame
 
         # Update attributes
+        if word not in self.used_words:
+            # One less unused valid answer under every counted constraints the word satisfies
+            for key in self.remaining_answers:
+                constraints = dict(key)
+                prefix = constraints.pop("prefix", "")
+                if word.startswith(prefix) and word_matches(word, **constraints):
+                    self.remaining_answers[key] -= 1
         self.used_words.add(word)
         self.turns += 1
 
@@ -440,7 +547,7 @@ class ClassicGame:
 
     async def running_initialization(self) -> None:
         # Random starting word
-        self.current_word = get_random_word(min_len=self.min_letters_limit)
+        self.current_word = get_random_word(min_len=self.min_letters_limit, dictionary=self.dictionary)
         self.used_words.add(self.current_word)
         self.start_time = datetime.now().replace(microsecond=0)
 
@@ -499,78 +606,103 @@ class ClassicGame:
 
     async def update_db(self) -> None:
         pool = get_pool()
-        async with pool.acquire() as conn:
+        async with timed_acquire(pool) as conn:
             # Insert game instance
-            await conn.execute(
-                """\
-                INSERT INTO game (group_id, players, game_mode, winner, start_time, end_time)
-                    VALUES ($1, $2, $3, $4, $5, $6);""",
-                self.group_id,
-                len(self.players),
-                self.__class__.__name__,
-                self.players_in_game[0].user_id if self.players_in_game else None,
-                self.start_time,
-                self.end_time
-            )
+            with DB_QUERY_SECONDS.time("insert_game"):
+                xid = await conn.fetchval(
+                    """\
+                    INSERT INTO game (group_id, players, game_mode, winner, start_time, end_time)
+                        VALUES ($1, $2, $3, $4, $5, $6)
+                        RETURNING txid_current();""",
+                    self.group_id,
+                    len(self.players),
+                    self.__class__.__name__,
+                    self.players_in_game[0].user_id if self.players_in_game else None,
+                    self.start_time,
+                    self.end_time
+                )
             # Get game id
-            game_id = await conn.fetchval(
-                "SELECT id FROM game WHERE group_id = $1 AND start_time = $2;",
-                self.group_id,
-                self.start_time
-            )
+            with DB_QUERY_SECONDS.time("select_game_id"):
+                game_id = await conn.fetchval(
+                    "SELECT id FROM game WHERE group_id = $1 AND start_time = $2;",
+                    self.group_id,
+                    self.start_time
+                )
+            with DB_QUERY_SECONDS.time("select_group_game_count"):
+                game_cnt = await conn.fetchval("SELECT COUNT(*) FROM game WHERE group_id = $1;", self.group_id)
+        rank_service.record("group_games", game_cnt - 1 or None, game_cnt, xid)  # None for the group's first game
         for player in self.players:  # Update db players in parallel
             asyncio.create_task(self.update_db_player(game_id, player))
 
     async def update_db_player(self, game_id: int, player: Player) -> None:
         pool = get_pool()
-        async with pool.acquire() as conn:
-            player_exists = bool(await conn.fetchval("SELECT id FROM player WHERE user_id = $1;", player.user_id))
-            if player_exists:  # Update player in db
-                await conn.execute(
-                    """\
-                    UPDATE player
-                    SET game_count = game_count + 1,
-                        win_count = win_count + $1,
-                        word_count = word_count + $2,
-                        letter_count = letter_count + $3,
-                        longest_word = CASE WHEN longest_word IS NULL THEN $4::TEXT
-                                            WHEN $4::TEXT IS NULL THEN longest_word
-                                            WHEN LENGTH($4::TEXT) > LENGTH(longest_word) THEN $4::TEXT
-                                            ELSE longest_word
-                                       END
-                    WHERE user_id = $5;""",
-                    int(player in self.players_in_game),  # Support no winner in some game modes
-                    player.word_count,
-                    player.letter_count,
-                    player.longest_word or None,
-                    player.user_id
+        async with timed_acquire(pool) as conn:
+            with DB_QUERY_SECONDS.time("select_player"):
+                player_exists = bool(
+                    await conn.fetchval("SELECT id FROM player WHERE user_id = $1;", player.user_id)
                 )
+            won = int(player in self.players_in_game)  # Support no winner in some game modes
+            if player_exists:  # Update player in db
+                with DB_QUERY_SECONDS.time("update_player"):
+                    res = await conn.fetchrow(
+                        """\
+                        UPDATE player
+                        SET game_count = game_count + 1,
+                            win_count = win_count + $1,
+                            word_count = word_count + $2,
+                            letter_count = letter_count + $3,
+                            longest_word = CASE WHEN longest_word IS NULL THEN $4::TEXT
+                                                WHEN $4::TEXT IS NULL THEN longest_word
+                                                WHEN LENGTH($4::TEXT) > LENGTH(longest_word) THEN $4::TEXT
+                                                ELSE longest_word
+                                           END,
+                            name = $6
+                        WHERE user_id = $5
+                        RETURNING win_count, word_count, txid_current() AS xid;""",
+                        won,
+                        player.word_count,
+                        player.letter_count,
+                        player.longest_word or None,
+                        player.user_id,
+                        player.full_name
+                    )
+                if res:
+                    rank_service.record("wins", res["win_count"] - won, res["win_count"], res["xid"])
+                    rank_service.record("words", res["word_count"] - player.word_count, res["word_count"], res["xid"])
             else:  # New player, create player in db
+                with DB_QUERY_SECONDS.time("insert_player"):
+                    xid = await conn.fetchval(
+                        """\
+                        INSERT INTO player (
+                            user_id, game_count, win_count, word_count, letter_count, longest_word, name
+                        )
+                            VALUES ($1, 1, $2, $3, $4, $5::TEXT, $6)
+                            RETURNING txid_current();""",
+                        player.user_id,
+                        won,
+                        player.word_count,
+                        player.letter_count,
+                        player.longest_word or None,
+                        player.full_name
+                    )
+                rank_service.record("wins", None, won, xid)
+                rank_service.record("words", None, player.word_count, xid)
+
+            # Create gameplayer in db
+            with DB_QUERY_SECONDS.time("insert_gameplayer"):
                 await conn.execute(
                     """\
-                    INSERT INTO player (user_id, game_count, win_count, word_count, letter_count, longest_word)
-                        VALUES ($1, 1, $2, $3, $4, $5::TEXT);""",
+                    INSERT INTO gameplayer (user_id, group_id, game_id, won, word_count, letter_count, longest_word)
+                        VALUES ($1, $2, $3, $4, $5, $6, $7);""",
                     player.user_id,
-                    int(player in self.players_in_game),  # No winner in some game modes
+                    self.group_id,
+                    game_id,
+                    player in self.players_in_game,
                     player.word_count,
                     player.letter_count,
                     player.longest_word or None
                 )
 
-            # Create gameplayer in db
-            await conn.execute(
-                """\
-                INSERT INTO gameplayer (user_id, group_id, game_id, won, word_count, letter_count, longest_word)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7);""",
-                player.user_id,
-                self.group_id,
-                game_id,
-                player in self.players_in_game,
-                player.word_count,
-                player.letter_count,
-                player.longest_word or None
-            )
-
     async def scan_for_stale_timer(self) -> None:
         # Check if game timer is stuck
         timer = self.time_left
@@ -592,48 +724,54 @@ class ClassicGame:
     async def main_loop(self, message: types.Message) -> None:
         # Attempt to fix issue of stuck game with negative timer.
         negative_timer = 0
+        loop = asyncio.get_running_loop()
         try:
             await self.send_message(
                 f"A{'n' if self.name[0] in 'aeiou' else ''} {self.name} is starting.\n"
                 f"{self.min_players}-{self.max_players} players are needed.\n"
                 f"{self.time_left}s to /join."
             )
-            await self.join(message)
+            async with GlobalState.chat_locks.hold(self.group_id):
+                await self.join(message)
 
             while True:
+                t = loop.time()
                 await asyncio.sleep(1)
-                if self.state == GameState.JOINING:
-                    if self.time_left > 0:
-                        self.time_left -= 1
-                        if self.time_left in (15, 30, 60):
-                            await self.send_message(f"{self.time_left}s left to /join.")
-                    elif len(self.players) < self.min_players:
-                        await self.send_message("Not enough players. Game terminated.")
-                        del GlobalState.games[self.group_id]
-                        return
-                    else:
-                        self.state = GameState.RUNNING
-                        await self.send_message("Game is starting...")
-
-                        random.shuffle(self.players)
-                        self.players_in_game = self.players[:]
-
-                        await self.running_initialization()
-                        await self.send_turn_message()
-                elif self.state == GameState.RUNNING:
-                    # Check for prolonged negative timer
-                    if self.time_left < 0:
-                        negative_timer += 1
-                    if negative_timer >= 5:
-                        raise ValueError("Prolonged negative timer.")
-
-                    if await self.running_phase_tick():  # True: Game ended
-                        await self.update_db()
+                GAME_TICK_LAG.observe(max(loop.time() - t - 1, 0), self.__class__.__name__)
+                # Updates of the group are not handled during a tick
+                async with GlobalState.chat_locks.hold(self.group_id):
+                    if self.state == GameState.JOINING:
+                        if self.time_left > 0:
+                            self.time_left -= 1
+                            if self.time_left in (15, 30, 60):
+                                await self.send_message(f"{self.time_left}s left to /join.")
+                        elif len(self.players) < self.min_players:
+                            await self.send_message("Not enough players. Game terminated.")
+                            del GlobalState.games[self.group_id]
+                            return
+                        else:
+                            self.state = GameState.RUNNING
+                            await self.send_message("Game is starting...")
+
+                            random.shuffle(self.players)
+                            self.players_in_game = self.players[:]
+
+                            await self.running_initialization()
+                            await self.send_turn_message()
+                    elif self.state == GameState.RUNNING:
+                        # Check for prolonged negative timer
+                        if self.time_left < 0:
+                            negative_timer += 1
+                        if negative_timer >= 5:
+                            raise ValueError("Prolonged negative timer.")
+
+                        if await self.running_phase_tick():  # True: Game ended
+                            await self.update_db()
+                            return
+                    elif self.state == GameState.KILLGAME:
+                        await self.send_message("Game ended forcibly.")
+                        GlobalState.games.pop(self.group_id, None)
                         return
-                elif self.state == GameState.KILLGAME:
-                    await self.send_message("Game ended forcibly.")
-                    GlobalState.games.pop(self.group_id, None)
-                    return
         except Exception as e:
             GlobalState.games.pop(self.group_id, None)
             try:
@@ -644,3 +782,5 @@ class ClassicGame:
             except:
                 pass
             raise
+        finally:
+            GlobalState.game_ended.set()  # Wake up /drain
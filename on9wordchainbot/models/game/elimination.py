@@ -1,3 +1,4 @@
+from bisect import bisect_left, insort
 from datetime import datetime
 from typing import Optional
 
@@ -8,16 +9,87 @@ from on9wordchainbot.models.game.classic import ClassicGame
 from on9wordchainbot.models.player import Player
 from on9wordchainbot.constants import GameSettings, GameState
 from on9wordchainbot.utils import get_random_word
+from on9wordchainbot.words import Dictionary, default_dictionary
+
+
+class Leaderboard:
+    # Players in game sorted by score descending then user id ascending,
+    # updated in place when scores change so that ranks are found by binary search.
+    # The user id part is to ensure consistent ordering of players with same score.
+
+    __slots__ = ("keys", "players", "entries", "full_text")
+
+    def __init__(self, players: list[Player]) -> None:
+        self.keys = sorted((-p.score, p.user_id) for p in players)
+        self.players = {p.user_id: p for p in players}
+        self.entries: dict[int, str] = {}  # User id -> rendered name and score
+        self.full_text: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def index(self, player: Player) -> int:
+        return bisect_left(self.keys, (-player.score, player.user_id))
+
+    def update(self, player: Player, old_score: int) -> None:
+        del self.keys[bisect_left(self.keys, (-old_score, player.user_id))]
+        insort(self.keys, (-player.score, player.user_id))
+        self.entries.pop(player.user_id, None)
+        self.full_text = None
+
+    def remove(self, player: Player) -> None:
+        del self.keys[self.index(player)]
+        del self.players[player.user_id]
+        self.entries.pop(player.user_id, None)
+        self.full_text = None
+
+    def line(self, i: int, highlight: bool = False) -> str:
+        user_id = self.keys[i][1]
+        entry = self.entries.get(user_id)
+        if entry is None:
+            p = self.players[user_id]
+            entry = self.entries[user_id] = f"{p.name}: {p.score}"
+        return f"{'> ' if highlight else ''}{i + 1}. {entry}"
+
+    def render(self, show_player: Optional[Player] = None) -> str:
+        n = len(self.keys)
+        if not show_player:
+            # Show every player
+            if self.full_text is None:
+                self.full_text = "\n".join(self.line(i) for i in range(n))
+            return self.full_text
+
+        # Highlight player (while showing 10 other players at max)
+        index = self.index(show_player)
+        if n <= 10:
+            # Show every player
+            lines = [self.line(i, i == index) for i in range(n)]
+        elif index <= 4 or index >= n - 5:
+            # Player is in first or last 5 places, show those places
+            lines = [self.line(i, i == index) for i in range(5)]
+            lines.append("...")
+            lines.extend(self.line(i, i == index) for i in range(n - 5, n))
+        else:
+            # Player not in first or last 5 places, show player in middle
+            lines = [self.line(i) for i in range(5)]
+            # Prevent unnecessary ellipses if player is 6th place from top or bottom
+            if index != 5:
+                lines.append("...")
+            lines.append(self.line(index, True))
+            if index != n - 6:
+                lines.append("...")
+            lines.extend(self.line(i) for i in range(n - 5, n))
+        return "\n".join(lines)
 
 
 class EliminationGame(ClassicGame):
     name = "elimination game"
     command = "startelim"
 
-    __slots__ = ("round", "turns_until_elimination", "exceeded_score_limit")
+    __slots__ = ("round", "turns_until_elimination", "exceeded_score_limit", "leaderboard")
 
-    def __init__(self, group_id: int) -> None:
-        super().__init__(group_id)
+    def __init__(self, group_id: int, dictionary: Dictionary = default_dictionary) -> None:
+        super().__init__(group_id, dictionary)
 
         # Elimination game settings
         self.min_players = GameSettings.ELIM_MIN_PLAYERS
@@ -32,6 +104,7 @@ class EliminationGame(ClassicGame):
         self.round = 1
         self.turns_until_elimination = 0
         self.exceeded_score_limit = False  # Remind players that there is a turn score increment ceiling
+        self.leaderboard: Optional[Leaderboard] = None  # Built when the leaderboard is first shown
 
     async def forcejoin(self, message: types.Message) -> None:
         # Joining in the middle of an elimination game puts one at a disadvantage since points are cumulative
@@ -40,55 +113,10 @@ class EliminationGame(ClassicGame):
             await super().forcejoin(message)
 
     def get_leaderboard(self, show_player: Optional[Player] = None) -> str:
-        # nightmare nightmare nightmare nightmare
-
-        # Make a copy of players in game
-        players = self.players_in_game[:]
-        # Sort by letter count descending then user id ascending
-        # The user id part is to ensure consistent ordering of players with same letter count
-        players.sort(key=lambda k: (-k.score, k.user_id))
-        text = ""
-
-        if not show_player:
-            # Show every player
-            for i, p in enumerate(players, start=1):
-                text += f"{i}. {p.name}: {p.score}\n"
-            return text.rstrip()
-
-        # Highlight player (while showing 10 other players at max)
-        if len(players) <= 10:
-            # Show every player
-            for i, p in enumerate(players, start=1):
-                line = f"{i}. {p.name}: {p.score}\n"
-                if p is show_player:
-                    line = "> " + line
-                text += line
-        elif players.index(show_player) <= 4 or players.index(show_player) >= len(players) - 5:
-            # Player is in first or last 5 places, show those places
-            for i, p in enumerate(players[:5], start=1):
-                line = f"{i}. {p.name}: {p.score}\n"
-                if p is show_player:
-                    line = "> " + line
-                text += line
-            text += "...\n"
-            for i, p in enumerate(players[-5:], start=len(players) - 4):
-                line = f"{i}. {p.name}: {p.score}\n"
-                if p is show_player:
-                    line = "> " + line
-                text += line
-        else:
-            # Player not in first or last 5 places, show player in middle
-            for i, p in enumerate(players[:5], start=1):
-                text += f"{i}. {p.name}: {p.score}\n"
-            # Prevent unnecessary ellipses if player is 6th place from top or bottom
-            if players[5] is not show_player:
-                text += "...\n"
-            text += f"> {players.index(show_player) + 1}. {show_player.name}: {show_player.score}\n"
-            if players[-6] is not show_player:
-                text += "...\n"
-            for i, p in enumerate(players[-5:], start=len(players) - 4):
-                text += f"{i}. {p.name}: {p.score}\n"
-        return text.rstrip()
+        # Rebuild if players joined or were eliminated without going through the leaderboard
+        if self.leaderboard is None or len(self.leaderboard) != len(self.players_in_game):
+            self.leaderboard = Leaderboard(self.players_in_game)
+        return self.leaderboard.render(show_player)
 
     async def send_turn_message(self) -> None:
         await self.send_message(
@@ -98,7 +126,8 @@ class EliminationGame(ClassicGame):
                 # Since they could be eliminated
                 + (f" (Next: {self.players_in_game[1].name})\n" if self.turns_until_elimination > 1 else "\n")
                 + f"Your word must start with <i>{self.current_word[-1].upper()}</i>.\n"
-                  f"You have <b>{self.time_limit}s</b> to answer.\n\n"
+                  f"You have <b>{self.time_limit}s</b> to answer.\n"
+                  f"Possible answers: {self.count_remaining_answers()}\n\n"
                   "Leaderboard:\n" + self.get_leaderboard(show_player=self.players_in_game[0])
             ),
             parse_mode=ParseMode.HTML
@@ -111,7 +140,11 @@ class EliminationGame(ClassicGame):
 
     def post_turn_processing(self, word: str) -> None:
         super().post_turn_processing(word)
-        self.players_in_game[0].score += min(len(word), GameSettings.ELIM_MAX_TURN_SCORE)
+        player = self.players_in_game[0]
+        old_score = player.score
+        player.score += min(len(word), GameSettings.ELIM_MAX_TURN_SCORE)
+        if self.leaderboard:
+            self.leaderboard.update(player, old_score)
         if len(word) > GameSettings.ELIM_MAX_TURN_SCORE:
             self.exceeded_score_limit = True
 
@@ -125,7 +158,7 @@ class EliminationGame(ClassicGame):
 
     async def running_initialization(self) -> None:
         # Random starting word
-        self.current_word = get_random_word()
+        self.current_word = get_random_word(dictionary=self.dictionary)
         self.used_words.add(self.current_word)
         self.start_time = datetime.now().replace(microsecond=0)
 
@@ -199,5 +232,8 @@ class EliminationGame(ClassicGame):
 
         # Update attributes
         self.players_in_game = [p for p in self.players_in_game if p not in eliminated]
+        if self.leaderboard:
+            for p in eliminated:
+                self.leaderboard.remove(p)
         self.round += 1
         self.turns_until_elimination = len(self.players_in_game)
@@ -1,13 +1,14 @@
 from on9wordchainbot.models.game.classic import ClassicGame
 from on9wordchainbot.constants import GameSettings
+from on9wordchainbot.words import Dictionary, default_dictionary
 
 
 class HardModeGame(ClassicGame):
     name = "hard mode game"
     command = "starthard"
 
-    def __init__(self, group_id: int) -> None:
-        super().__init__(group_id)
+    def __init__(self, group_id: int, dictionary: Dictionary = default_dictionary) -> None:
+        super().__init__(group_id, dictionary)
         # Hardest settings available
         self.time_limit = GameSettings.MIN_TURN_SECONDS
         self.min_letters_limit = GameSettings.MAX_WORD_LENGTH_LIMIT
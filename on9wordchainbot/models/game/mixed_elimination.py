@@ -1,6 +1,6 @@
 import random
 from datetime import datetime
-from string import ascii_lowercase
+from typing import Any
 
 from aiogram import types
 from aiogram.enums import ParseMode
@@ -10,7 +10,8 @@ from on9wordchainbot.models.game.chosen_first_letter import ChosenFirstLetterGam
 from on9wordchainbot.models.game.classic import ClassicGame
 from on9wordchainbot.models.game.elimination import EliminationGame
 from on9wordchainbot.models.game.required_letter import RequiredLetterGame
-from on9wordchainbot.utils import check_word_existence, get_random_word
+from on9wordchainbot.utils import check_word_existence, get_random_word, get_suggestion_text
+from on9wordchainbot.words import default_dictionary
 
 
 class MixedEliminationGame(EliminationGame):
@@ -30,8 +31,8 @@ class MixedEliminationGame(EliminationGame):
 
     __slots__ = ("game_mode", "banned_letters", "required_letter")
 
-    def __init__(self, group_id):
-        super().__init__(group_id)
+    def __init__(self, group_id, dictionary=default_dictionary):
+        super().__init__(group_id, dictionary)
         self.game_mode = None
         self.banned_letters = []
         self.required_letter = None
@@ -54,7 +55,8 @@ class MixedEliminationGame(EliminationGame):
             text += f" and <b>include</b> <i>{self.required_letter.upper()}</i>"
         text += ".\n"
 
-        text += f"You have <b>{self.time_limit}s</b> to answer.\n\n"
+        text += f"You have <b>{self.time_limit}s</b> to answer.\n"
+        text += f"Possible answers: {self.count_remaining_answers()}\n\n"
         text += "Leaderboard:\n" + self.get_leaderboard(show_player=self.players_in_game[0])
         await self.send_message(text, parse_mode=ParseMode.HTML)
 
@@ -63,6 +65,18 @@ class MixedEliminationGame(EliminationGame):
         self.accepting_answers = True
         self.time_left = self.time_limit
 
+    def get_answer_constraints(self) -> dict[str, Any]:
+        if self.game_mode is ChosenFirstLetterGame:
+            constraints: dict[str, Any] = {"prefix": self.current_word[0]}
+        else:
+            constraints = {"prefix": self.current_word[-1]}
+
+        if self.game_mode is BannedLettersGame:
+            constraints["banned_letters"] = self.banned_letters
+        elif self.game_mode is RequiredLetterGame:
+            constraints["required_letter"] = self.required_letter
+        return constraints
+
     async def additional_answer_checkers(self, word: str, message: types.Message) -> bool:
         if self.game_mode is BannedLettersGame:
             return await BannedLettersGame.additional_answer_checkers(self, word, message)
@@ -89,8 +103,10 @@ class MixedEliminationGame(EliminationGame):
         if word in self.used_words:
             await message.reply(f"_{word.capitalize()}_ has been used.")
             return
-        if not check_word_existence(word):
-            await message.reply(f"_{word.capitalize()}_ is not in my list of words.")
+        if not check_word_existence(word, self.dictionary):
+            # Only words one edit away, which are found quickly
+            suggestion_text = get_suggestion_text(word, self.dictionary, max_distance=1)
+            await message.reply(f"_{word.capitalize()}_ is not in my list of words.{suggestion_text}")
             return
         if not await self.additional_answer_checkers(word, message):
             return
@@ -113,12 +129,15 @@ class MixedEliminationGame(EliminationGame):
         # Set starting word and mode-based attributes
         if self.game_mode is BannedLettersGame:
             BannedLettersGame.set_banned_letters(self)
-            self.current_word = get_random_word(banned_letters=self.banned_letters)
+            self.current_word = get_random_word(banned_letters=self.banned_letters, dictionary=self.dictionary)
         elif self.game_mode is ChosenFirstLetterGame:
             # Ensure uniform probability of each letter as the starting letter
-            self.current_word = get_random_word(prefix=random.choice(ascii_lowercase))
+            self.current_word = get_random_word(
+                prefix=random.choice(ChosenFirstLetterGame.get_possible_letters(self.dictionary)),
+                dictionary=self.dictionary
+            )
         else:
-            self.current_word = get_random_word()
+            self.current_word = get_random_word(dictionary=self.dictionary)
         if self.game_mode is RequiredLetterGame:
             RequiredLetterGame.change_required_letter(self)
         self.used_words.add(self.current_word)
@@ -1,25 +1,46 @@
+import logging
 import random
 from datetime import datetime
+from typing import Any, Optional
 
 from aiogram.enums import ParseMode
 
 from on9wordchainbot.models.game.classic import ClassicGame
 from on9wordchainbot.utils import get_random_word
 
+logger = logging.getLogger(__name__)
+
 
 class RandomFirstLetterGame(ClassicGame):
     name = "random first letter game"
     command = "startrfl"
 
+    def get_next_answer_constraints(self, last_letter: str) -> Optional[dict[str, Any]]:
+        return None  # The next first letter is random
+
     def change_first_letter(self) -> None:
-        self.current_word = random.choice(self.current_word)
+        # Random letter of the word out of those which still have unused answers,
+        # or of all starting letters if none of them do
+        letters = [c for c in self.current_word or "" if c in self.dictionary.first_letters]
+        letters_with_answers = {c for c in set(letters) if self.has_unused_answers(c)}
+        if not letters_with_answers:
+            letters = list(self.dictionary.first_letters)
+            letters_with_answers = {c for c in letters if self.has_unused_answers(c)}
+        if not letters_with_answers:
+            logger.warning(f"No starting letters with unused answers left in group {self.group_id}")
+            self.current_word = random.choice(self.current_word)
+            return
+        self.current_word = random.choice([c for c in letters if c in letters_with_answers])
+
+    def has_unused_answers(self, letter: str) -> bool:
+        return self.dictionary.count_words(letter, self.min_letters_limit, exclude_words=self.used_words) > 0
 
     def post_turn_processing(self, word: str) -> None:
         super().post_turn_processing(word)
         self.change_first_letter()
 
     async def running_initialization(self) -> None:
-        self.current_word = get_random_word(min_len=self.min_letters_limit)
+        self.current_word = get_random_word(min_len=self.min_letters_limit, dictionary=self.dictionary)
         self.used_words.add(self.current_word)
         self.start_time = datetime.now().replace(microsecond=0)
 
@@ -1,13 +1,13 @@
 import random
 from datetime import datetime
-from string import ascii_lowercase
-from typing import Optional
+from typing import Any, Optional
 
 from aiogram import types
 from aiogram.enums import ParseMode
 
 from on9wordchainbot.models.game.classic import ClassicGame
 from on9wordchainbot.utils import get_random_word
+from on9wordchainbot.words import Dictionary, default_dictionary
 
 
 class RequiredLetterGame(ClassicGame):
@@ -16,8 +16,8 @@ class RequiredLetterGame(ClassicGame):
 
     __slots__ = ("required_letter",)
 
-    def __init__(self, group_id: int) -> None:
-        super().__init__(group_id)
+    def __init__(self, group_id: int, dictionary: Dictionary = default_dictionary) -> None:
+        super().__init__(group_id, dictionary)
         # Answer must contain required letter.
         # Required letter cannot be the ending letter of self.current_word so as to annoy the player.
         self.required_letter: Optional[str] = None  # Changes every turn
@@ -31,7 +31,8 @@ class RequiredLetterGame(ClassicGame):
                 f"<b>at least {self.min_letters_limit} letter{'' if self.min_letters_limit == 1 else 's'}</b>.\n"
                 f"You have <b>{self.time_limit}s</b> to answer.\n"
                 f"Players remaining: {len(self.players_in_game)}/{len(self.players)}\n"
-                f"Total words: {self.turns}"
+                f"Total words: {self.turns}\n"
+                f"Possible answers: {self.count_remaining_answers()}"
             ),
             parse_mode=ParseMode.HTML
         )
@@ -44,13 +45,14 @@ class RequiredLetterGame(ClassicGame):
         if self.players_in_game[0].is_vp:
             await self.vp_answer()
 
-    def get_random_valid_answer(self) -> Optional[str]:
-        return get_random_word(
-            min_len=self.min_letters_limit,
-            prefix=self.current_word[-1],
-            required_letter=self.required_letter,
-            exclude_words=self.used_words
-        )
+    def get_answer_constraints(self) -> dict[str, Any]:
+        return {**super().get_answer_constraints(), "required_letter": self.required_letter}
+
+    def get_next_answer_constraints(self, last_letter: str) -> Optional[dict[str, Any]]:
+        constraints = super().get_next_answer_constraints(last_letter)
+        if constraints:
+            del constraints["required_letter"]  # Not known until the answer is accepted
+        return constraints
 
     async def additional_answer_checkers(self, word: str, message: types.Message) -> bool:
         if self.required_letter not in word:
@@ -61,9 +63,12 @@ class RequiredLetterGame(ClassicGame):
         return True
 
     def change_required_letter(self) -> None:
-        letters = list(ascii_lowercase)
-        letters.remove(self.current_word[-1])
-        self.required_letter = random.choice(letters)
+        first_letter = self.current_word[-1]
+        letters = [c for c in self.dictionary.alphabet if c != first_letter]
+        # Avoid letters not included in any word starting with the current letter
+        contained_letters = self.dictionary.contained_letters(first_letter, self.min_letters_limit)
+        possible_letters = [c for c in letters if c in contained_letters]
+        self.required_letter = random.choice(possible_letters or letters)
 
     def post_turn_processing(self, word: str) -> None:
         super().post_turn_processing(word)
@@ -71,7 +76,7 @@ class RequiredLetterGame(ClassicGame):
 
     async def running_initialization(self) -> None:
         # Random starting word
-        self.current_word = get_random_word(min_len=self.min_letters_limit)
+        self.current_word = get_random_word(min_len=self.min_letters_limit, dictionary=self.dictionary)
         self.used_words.add(self.current_word)
         self.change_required_letter()
         self.start_time = datetime.now().replace(microsecond=0)
@@ -1,21 +1,25 @@
-from aiogram import types, html
+from aiogram import Bot, types, html
 
-from on9wordchainbot.resources import on9bot
+from on9wordchainbot.resources import vp_bots
 from on9wordchainbot.constants import STAR
 from on9wordchainbot.utils import has_star
 
 
 class Player:
     __slots__ = (
-        "_username", "_name", "user_id", "is_vp", "word_count", "letter_count", "longest_word", "score"
+        "_username", "_full_name", "_star", "name", "mention", "user_id", "is_vp",
+        "word_count", "letter_count", "longest_word", "score"
     )
+    name: str
+    mention: str
 
-    def __init__(self, user: types.User) -> None:
+    def __init__(self, user: types.User, star: bool = False) -> None:
         self._username = user.username
-        self._name = user.full_name
+        self._star = star
+        self._full_name = user.full_name  # Unformatted, stored for leaderboards
         self.user_id = user.id
 
-        self.is_vp = user.id == on9bot.id
+        self.is_vp = user.id in vp_bots
         self.word_count = 0
         self.letter_count = 0
         self.longest_word = ""
@@ -26,26 +30,37 @@ class Player:
         self.score = 0
 
     @property
-    def name(self) -> str:
-        if self._username:
-            return f"<a href='https://t.me/{self._username}'>{html.quote(self._name)}</a>"
-        else:
-            return f"<b>{html.quote(self._name)}</b>"
+    def full_name(self) -> str:
+        return self._full_name
 
-    @property
-    def mention(self) -> str:
-        return f"<a href='tg://user?id={self.user_id}'>{html.quote(self._name)}</a>"
+    @full_name.setter
+    def full_name(self, full_name: str) -> None:
+        self._full_name = full_name
+        for attr in ("name", "mention"):  # Rendered again on next access
+            try:
+                delattr(self, attr)  # hasattr would render them
+            except AttributeError:
+                pass
+
+    def __getattr__(self, attr: str) -> str:
+        # Only called for unset slots, so name and mention are rendered on first access
+        # and then read like plain attributes, only players listed in messages store them
+        if attr not in ("name", "mention"):
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{attr}'")
+        quoted_name = html.quote(self._full_name + " " + STAR if self._star else self._full_name)
+        if attr == "mention":
+            self.mention = f"<a href='tg://user?id={self.user_id}'>{quoted_name}</a>"
+        elif self._username:
+            self.name = f"<a href='https://t.me/{self._username}'>{quoted_name}</a>"
+        else:
+            self.name = f"<b>{quoted_name}</b>"
+        return getattr(self, attr)
 
     @classmethod
     async def create(cls, user: types.User) -> "Player":
-        player = Player(user)
-        if await has_star(user.id):  # Donation reward
-            player._name += " " + STAR
-        return player
+        return Player(user, star=await has_star(user.id))  # Star is a donation reward
 
     @classmethod
-    async def vp(cls) -> "Player":
-        on9bot_user = await on9bot.me()
-        vp = Player(on9bot_user)
-        vp._name += " " + STAR
-        return vp
+    async def vp(cls, vp_bot: Bot) -> "Player":
+        vp_user = await vp_bot.me()
+        return Player(vp_user, star=True)
@@ -0,0 +1,96 @@
+import random
+import time
+from typing import TYPE_CHECKING, Callable, Optional
+
+from on9wordchainbot.constants import GameSettings
+from on9wordchainbot.utils import get_random_word
+
+if TYPE_CHECKING:
+    from on9wordchainbot.models.game.classic import ClassicGame
+
+# Strategies choose the VP's answer given the game and a perf_counter() deadline,
+# returning None if there are no valid answers
+Strategy = Callable[["ClassicGame", float], Optional[str]]
+
+
+def random_strategy(game: "ClassicGame", deadline: float) -> Optional[str]:
+    return game.get_random_valid_answer()
+
+
+def longest_strategy(game: "ClassicGame", deadline: float) -> Optional[str]:
+    # Walk the minimum length down the precomputed counts instead of scanning every valid answer.
+    # Words of at least GameSettings.MAX_WORD_LENGTH_LIMIT letters (the longest counted) are treated as equally long.
+    constraints = game.get_answer_constraints()
+    min_len = constraints.pop("min_len", 1)
+    for length in range(GameSettings.MAX_WORD_LENGTH_LIMIT, min_len, -1):
+        if time.perf_counter() > deadline:
+            break  # Out of time, any valid answer
+        if game.dictionary.count_words(**constraints, min_len=length, exclude_words=game.used_words):
+            return get_random_word(
+                **constraints, min_len=length, exclude_words=game.used_words, dictionary=game.dictionary
+            )
+    return random_strategy(game, deadline)
+
+
+def trap_strategy(game: "ClassicGame", deadline: float) -> Optional[str]:
+    # Choose a word ending in the letter which leaves the next player the fewest valid answers,
+    # out of a bounded random sample of valid answers
+    if time.perf_counter() > deadline:
+        return random_strategy(game, deadline)
+
+    dictionary = game.dictionary
+    constraints = game.get_answer_constraints()
+    prefix = constraints.pop("prefix", None)
+    start, stop = dictionary.words.prefix_range(prefix) if prefix else (0, dictionary.count)
+    # Only ids are filtered, words are looked up for the sample
+    ids = dictionary.filter_ids(start, stop, **constraints, exclude_words=game.used_words)
+    if not ids:
+        return None
+    words = [dictionary.words[i] for i in random.sample(ids, min(len(ids), GameSettings.VP_TRAP_CANDIDATES))]
+
+    words_by_last_letter: dict[str, list[str]] = {}
+    for w in words:
+        words_by_last_letter.setdefault(w[-1], []).append(w)
+    last_letters = list(words_by_last_letter)
+    random.shuffle(last_letters)  # Break ties randomly
+
+    best_letter = None
+    best_count = 0
+    for letter in last_letters:
+        if time.perf_counter() > deadline:
+            break  # Out of time, use the best letter so far
+        next_constraints = game.get_next_answer_constraints(letter)
+        if next_constraints is None:  # Next player's constraints do not depend on this answer
+            break
+        # Precomputed counts, only words used in this game are checked
+        count = dictionary.count_words(**next_constraints, exclude_words=game.used_words)
+        if best_letter is None or count < best_count:
+            best_letter = letter
+            best_count = count
+            if not count:
+                break
+
+    if best_letter is None:
+        return random.choice(words)
+    return random.choice(words_by_last_letter[best_letter])
+
+
+STRATEGIES: dict[str, Strategy] = {
+    "random": random_strategy,
+    "longest": longest_strategy,
+    "trap": trap_strategy
+}
+
+# VP difficulty -> strategy name
+DIFFICULTIES = {
+    "easy": "random",
+    "normal": "longest",
+    "hard": "trap"
+}
+DEFAULT_DIFFICULTY = "easy"
+
+
+def choose_vp_answer(game: "ClassicGame", difficulty: str, cpu_budget: float) -> Optional[str]:
+    # Strategies check the deadline between steps and fall back to the best answer found so far
+    strategy = STRATEGIES[DIFFICULTIES[difficulty]]
+    return strategy(game, time.perf_counter() + cpu_budget)
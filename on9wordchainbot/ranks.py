@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from array import array
+from bisect import bisect_right, insort
+from typing import Any, Optional
+
+from on9wordchainbot.constants import RANK_FETCH_ROWS, RANK_MAX_PENDING_CHANGES
+from on9wordchainbot.metrics import DB_QUERY_SECONDS, timed_acquire
+from on9wordchainbot.resources import get_pool
+from on9wordchainbot.words import HAS_NUMPY
+
+if HAS_NUMPY:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Ranking -> query of the scores of everyone ranked
+RANK_QUERIES = {
+    "wins": "SELECT win_count FROM player;",
+    "words": "SELECT word_count FROM player;",
+    "group_games": "SELECT COUNT(*) FROM game GROUP BY group_id;"
+}
+
+
+def sort_scores(scores: "array[int]") -> Any:
+    # Ascending NumPy array, or array if NumPy is unavailable
+    if HAS_NUMPY:
+        return np.sort(np.frombuffer(scores, dtype=np.int64))
+    return array("q", sorted(scores))
+
+
+# PostgreSQL snapshot as returned by txid_current_snapshot(): (xmin, xmax, transaction ids in progress)
+Snapshot = tuple[int, int, tuple[int, ...]]
+
+
+def is_visible(xid: int, snapshot: Snapshot) -> bool:
+    # Whether changes of a committed transaction are seen by queries using the snapshot
+    xmin, xmax, in_progress = snapshot
+    return xid < xmin or (xid < xmax and xid not in in_progress)
+
+
+class Ranking:
+    # Sorted snapshot of all scores, with the scores changed since then applied on top.
+    # A changed score is counted by adding its new value and removing its old value,
+    # so a rank is still found by binary search without updating the snapshot.
+
+    __slots__ = ("scores", "added", "removed", "pending")
+
+    def __init__(self) -> None:
+        self.scores: Any = sort_scores(array("q"))
+        self.added: list[int] = []  # Sorted new scores since the snapshot
+        self.removed: list[int] = []  # Sorted old scores since the snapshot, which are in the snapshot
+        # (old score, new score, transaction id) of changes since a refresh started, None if not refreshing.
+        # Whether the new snapshot includes them is only known once it is read.
+        self.pending: Optional[list[tuple[Optional[int], int, int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.scores) + len(self.added) - len(self.removed)
+
+    def count_higher(self, score: int) -> int:
+        if HAS_NUMPY:
+            higher = len(self.scores) - int(np.searchsorted(self.scores, score, side="right"))
+        else:
+            higher = len(self.scores) - bisect_right(self.scores, score)
+        higher += len(self.added) - bisect_right(self.added, score)
+        higher -= len(self.removed) - bisect_right(self.removed, score)
+        return higher
+
+    def record(self, old_score: Optional[int], new_score: int, xid: int) -> None:
+        # old_score is None for new players, xid is the id of the transaction which committed the change
+        insort(self.added, new_score)
+        if old_score is not None:
+            insort(self.removed, old_score)
+        if self.pending is not None:
+            self.pending.append((old_score, new_score, xid))
+
+    def start_refresh(self) -> None:
+        # Changes recorded before this are committed before the new snapshot is taken, so it includes them
+        self.pending = []
+
+    def finish_refresh(self, scores: Any, snapshot: Snapshot) -> None:
+        # Changes recorded during the refresh are applied on top of the new snapshot unless it already includes them
+        changes = [(old, new) for old, new, xid in self.pending or () if not is_visible(xid, snapshot)]
+        self.scores = scores
+        self.added = sorted(new for _, new in changes)
+        self.removed = sorted(old for old, _ in changes if old is not None)
+        self.pending = None
+
+    def cancel_refresh(self) -> None:
+        self.pending = None
+
+
+class RankService:
+    # Global ranks of scores from sorted snapshots of all scores held in memory,
+    # instead of counting rows with higher scores in the database for every query.
+    # Snapshots are refreshed periodically and changes reported after games are applied in between.
+
+    def __init__(self) -> None:
+        self.rankings = {name: Ranking() for name in RANK_QUERIES}
+        self.refresh_lock = asyncio.Lock()
+        self.refresh_task: Optional[asyncio.Task[None]] = None  # Early refresh, referenced so it is not collected
+
+    async def refresh(self) -> None:
+        if self.refresh_lock.locked():  # Already refreshing
+            return
+        async with self.refresh_lock:
+            pool = get_pool()
+            for name, query in RANK_QUERIES.items():
+                ranking = self.rankings[name]
+                ranking.start_refresh()
+                try:
+                    scores = array("q")
+                    # Streamed with a cursor into a compact array, cursors require a transaction.
+                    # All queries of a repeatable read transaction use the same snapshot,
+                    # which tells which changes recorded meanwhile the scores include.
+                    async with (
+                        timed_acquire(pool) as conn,
+                        conn.transaction(isolation="repeatable_read", readonly=True)
+                    ):
+                        snapshot = await conn.fetchval("SELECT txid_current_snapshot();")
+                        with DB_QUERY_SECONDS.time(f"rank_{name}"):
+                            async for row in conn.cursor(query, prefetch=RANK_FETCH_ROWS):
+                                scores.append(row[0])
+                    ranking.finish_refresh(await asyncio.to_thread(sort_scores, scores), snapshot)
+                except Exception:  # Keep the current snapshot and refresh other rankings
+                    logger.exception(f"Failed to refresh ranking {name}")
+                finally:
+                    ranking.cancel_refresh()  # Stop keeping changes if not finished
+            logger.info("Rank snapshots refreshed")
+
+    def record(self, name: str, old_score: Optional[int], new_score: int, xid: int) -> None:
+        # xid is txid_current() of the transaction which changed the score
+        ranking = self.rankings[name]
+        ranking.record(old_score, new_score, xid)
+        # Keep changes few so that they are cheap to insert into
+        if len(ranking.added) > RANK_MAX_PENDING_CHANGES and (self.refresh_task is None or self.refresh_task.done()):
+            self.refresh_task = asyncio.create_task(self.refresh())
+
+    def rank(self, name: str, score: int) -> Optional[tuple[int, int]]:
+        # Rank of a score (1 for the highest score, tied scores share a rank) and the number of scores ranked,
+        # None if there are no scores yet
+        ranking = self.rankings[name]
+        if not len(ranking):
+            return None
+        return ranking.count_higher(score) + 1, len(ranking)
+
+
+rank_service = RankService()
@@ -0,0 +1,49 @@
+import asyncio
+import time
+from collections import deque
+from typing import Hashable
+
+
+class RateLimiter:
+    # Allows at most `limit` events in any `period` seconds, waiting in order of arrival
+
+    def __init__(self, limit: int, period: float) -> None:
+        self.limit = limit
+        self.period = period
+        self.events: deque[float] = deque()  # Monotonic times of recent events
+        self.lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self.lock:
+            now = time.monotonic()
+            while self.events and self.events[0] <= now - self.period:
+                self.events.popleft()
+            if len(self.events) >= self.limit:
+                await asyncio.sleep(self.events.popleft() + self.period - now)
+            self.events.append(time.monotonic())
+
+
+class KeyedRateLimiter:
+    # A RateLimiter for each key (e.g. a chat or a bot), shared by every caller with the same key.
+    # Limiters without events in the last period are dropped.
+
+    def __init__(self, limit: int, period: float) -> None:
+        self.limit = limit
+        self.period = period
+        self.limiters: dict[Hashable, RateLimiter] = {}
+        self.last_prune = time.monotonic()
+
+    async def wait(self, key: Hashable) -> None:
+        now = time.monotonic()
+        if now - self.last_prune > self.period:
+            self.prune(now)
+        limiter = self.limiters.get(key)
+        if limiter is None:
+            limiter = self.limiters[key] = RateLimiter(self.limit, self.period)
+        await limiter.wait()
+
+    def prune(self, now: float) -> None:
+        self.last_prune = now
+        for key, limiter in list(self.limiters.items()):
+            if not limiter.lock.locked() and (not limiter.events or limiter.events[-1] <= now - self.period):
+                del self.limiters[key]
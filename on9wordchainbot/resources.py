@@ -5,11 +5,15 @@ from typing import TYPE_CHECKING, Optional
 
 import aiohttp
 import asyncpg
+from aiohttp import web
 from aiogram import Bot
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
 
-from on9wordchainbot.constants import TOKEN, ON9BOT_TOKEN, DB_URI
+from on9wordchainbot.chat_locks import ChatLocks
+from on9wordchainbot.constants import TOKEN, ON9BOT_TOKEN, DB_URI, METRICS_PORT, VP_TOKENS, GameSettings
+from on9wordchainbot.metrics import start_metrics_server
+from on9wordchainbot.rate_limiter import KeyedRateLimiter
 
 if TYPE_CHECKING:
     from on9wordchainbot.models import ClassicGame
@@ -21,9 +25,16 @@ logger = logging.getLogger(__name__)
 class GlobalState:
     build_time = datetime.now().replace(microsecond=0)
     maint_mode = False
+    drain_task: Optional["asyncio.Task[None]"] = None  # Set while draining games before a restart
+    maint_mode_before_drain = False  # Restored when draining is cancelled or fails
+    game_ended = asyncio.Event()  # Set when a game loop ends, cleared by its waiters
 
     games: dict[int, "ClassicGame"] = {}  # group id -> game instance
     games_lock: asyncio.Lock = asyncio.Lock()
+    chat_locks = ChatLocks()  # Shared by update handlers and game loops of each group
+    # Messages of virtual players in all games, limited per group and per virtual player bot
+    vp_chat_rate_limiter = KeyedRateLimiter(GameSettings.VP_MESSAGES_PER_MINUTE, 60)
+    vp_bot_rate_limiter = KeyedRateLimiter(GameSettings.VP_MESSAGES_PER_SECOND, 1)
 
 
 bot = Bot(
@@ -35,11 +46,14 @@ bot = Bot(
     )
 )
 on9bot = Bot(ON9BOT_TOKEN)
+# Virtual player bots by bot id, each can join a game once
+vp_bots: dict[int, Bot] = {b.id: b for b in (on9bot, *(Bot(token) for token in VP_TOKENS))}
 
 
 # Initialized on startup
 session: Optional[aiohttp.ClientSession] = None
 pool: Optional[asyncpg.pool.Pool] = None
+metrics_runner: Optional[web.AppRunner] = None
 
 
 def get_session() -> aiohttp.ClientSession:
@@ -55,14 +69,19 @@ def get_pool() -> asyncpg.pool.Pool:
 
 
 async def init_resources() -> None:
-    global session, pool
+    global session, pool, metrics_runner
 
     session = aiohttp.ClientSession()
 
     logger.info("Connecting to database...")
     pool = await asyncpg.create_pool(DB_URI)
 
+    if METRICS_PORT:
+        metrics_runner = await start_metrics_server(METRICS_PORT)
+
 
 async def close_resources() -> None:
-    global session, pool
+    global session, pool, metrics_runner
+    if metrics_runner:
+        await metrics_runner.cleanup()
     await asyncio.gather(session.close(), pool.close())
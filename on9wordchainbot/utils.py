@@ -1,22 +1,51 @@
 import random
 from functools import wraps
-from string import ascii_lowercase
-from typing import Any, Awaitable, Callable, Coroutine, Optional, TypeVar
+from typing import Any, Awaitable, Callable, Coroutine, Iterable, Optional, TypeVar
 
 from aiocache import cached
 from aiogram import types
 
-from on9wordchainbot.constants import ADMIN_GROUP_ID, VIP
-from on9wordchainbot.resources import bot, on9bot, get_pool
-from on9wordchainbot.words import Words
+from on9wordchainbot.constants import (ADMIN_GROUP_ID, DICTIONARIES, MESSAGE_LENGTH_LIMIT, SUGGESTION_LIMIT,
+                                       SUGGESTION_TIME_BUDGET_SECONDS, VIP)
+from on9wordchainbot.metrics import FILTER_WORDS_CANDIDATES
+from on9wordchainbot.resources import bot, get_pool, vp_bots
+from on9wordchainbot.words import Dictionary, WordSet, default_dictionary, get_dictionary
 
 
 def is_word(s: str) -> bool:
-    return all(c in ascii_lowercase for c in s)
+    # All ASCII lowercase letters, checked without a per-character loop
+    return not s or s.isascii() and s.isalpha() and s.islower()
 
 
-def check_word_existence(word: str) -> bool:
-    return word in Words.dawg
+def check_word_existence(word: str, dictionary: Dictionary = default_dictionary) -> bool:
+    return word in dictionary.dawg
+
+
+async def check_words(
+    words: Iterable[str], dictionary: Dictionary = default_dictionary
+) -> tuple[list[str], list[str], dict[str, Optional[str]]]:
+    # Distinct words split into words in the dictionary, new words, and rejected words with their rejection reasons.
+    # Only words not in the dictionary are looked up in the word list table, in a single query.
+    existing, absent = dictionary.split_words(words)
+    if not absent:
+        return existing, [], {}
+
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            "SELECT word, reason FROM wordlist WHERE NOT accepted AND word = ANY($1::TEXT[]);", absent
+        )
+    rejected = {row["word"]: row["reason"] for row in rows}
+    return existing, [w for w in absent if w not in rejected], rejected
+
+
+def get_suggestion_text(word: str, dictionary: Dictionary = default_dictionary, max_distance: int = 2) -> str:
+    # " Did you mean ...?" with words close to a word not in the dictionary, empty if there are none.
+    # Words two or more edits away are searched for until the time budget runs out, words one edit away are quick.
+    suggestions = dictionary.suggest(word, max_distance, SUGGESTION_LIMIT, SUGGESTION_TIME_BUDGET_SECONDS)
+    if not suggestions:
+        return ""
+    return f" Did you mean {' or '.join(f'_{w.capitalize()}_' for w in suggestions)}?"
 
 
 def filter_words(
@@ -24,18 +53,16 @@ def filter_words(
     prefix: Optional[str] = None,
     required_letter: Optional[str] = None,
     banned_letters: Optional[list[str]] = None,
-    exclude_words: Optional[set[str]] = None
+    exclude_words: Optional[WordSet] = None,
+    dictionary: Dictionary = default_dictionary
 ) -> list[str]:
-    words: list[str] = Words.dawg.keys(prefix) if prefix else Words.dawg.keys()
-    if min_len > 1:
-        words = [w for w in words if len(w) >= min_len]
-    if required_letter:
-        words = [w for w in words if required_letter in w]
-    if banned_letters:
-        words = [w for w in words if all(i not in w for i in banned_letters)]
-    if exclude_words:
-        words = [w for w in words if w not in exclude_words]
-    return words
+    start, stop = dictionary.words.prefix_range(prefix) if prefix else (0, dictionary.count)
+    FILTER_WORDS_CANDIDATES.observe(stop - start)
+    words = dictionary.words.slice(start, stop)
+    ids = dictionary.filter_ids(start, stop, min_len, required_letter, banned_letters, exclude_words)
+    if len(ids) == len(words):
+        return words
+    return [words[i - start] for i in ids]
 
 
 def get_random_word(
@@ -43,10 +70,37 @@ def get_random_word(
     prefix: Optional[str] = None,
     required_letter: Optional[str] = None,
     banned_letters: Optional[list[str]] = None,
-    exclude_words: Optional[set[str]] = None
+    exclude_words: Optional[WordSet] = None,
+    dictionary: Dictionary = default_dictionary
 ) -> Optional[str]:
-    words = filter_words(min_len, prefix, required_letter, banned_letters, exclude_words)
-    return random.choice(words) if words else None
+    # Only the chosen word is looked up
+    start, stop = dictionary.words.prefix_range(prefix) if prefix else (0, dictionary.count)
+    FILTER_WORDS_CANDIDATES.observe(stop - start)
+    ids = dictionary.filter_ids(start, stop, min_len, required_letter, banned_letters, exclude_words)
+    return dictionary.words[random.choice(ids)] if ids else None
+
+
+async def get_group_dictionary_name(group_id: int) -> str:
+    # Name of the dictionary chosen for a group with /dictionary, the default dictionary for other chats
+    pool = get_pool()
+    async with pool.acquire() as conn:
+        name = await conn.fetchval("SELECT dictionary FROM groupdictionary WHERE group_id = $1;", group_id)
+    if name not in DICTIONARIES:  # None or removed from the configuration
+        return default_dictionary.name
+    return name
+
+
+async def get_group_dictionary(group_id: int) -> Dictionary:
+    return await get_dictionary(await get_group_dictionary_name(group_id))
+
+
+async def reply_text_or_document(message: types.Message, text: str, filename: str) -> types.Message:
+    # Telegram rejects messages longer than the limit
+    if len(text) <= MESSAGE_LENGTH_LIMIT:
+        return await message.reply(text)
+    return await message.reply_document(
+        types.BufferedInputFile(text.encode(), filename), caption="The reply is too long, so it is attached as a file."
+    )
 
 
 async def send_admin_group(*args: Any, **kwargs: Any) -> types.Message:
@@ -63,7 +117,7 @@ async def amt_donated(user_id: int) -> int:
 
 @cached(ttl=15)
 async def has_star(user_id: int) -> bool:
-    return user_id in VIP or user_id == on9bot.id or await amt_donated(user_id) > 0
+    return user_id in VIP or user_id in vp_bots or await amt_donated(user_id) > 0
 
 
 def inline_keyboard_from_button(button: types.InlineKeyboardButton) -> types.InlineKeyboardMarkup:
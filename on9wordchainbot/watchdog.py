@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from aiogram import html
+from aiogram.enums import ParseMode
+
+from on9wordchainbot.constants import LOOP_LAG_REPORT_INTERVAL_SECONDS, LOOP_LAG_THRESHOLD_SECONDS
+from on9wordchainbot.metrics import EVENT_LOOP_LAG
+from on9wordchainbot.utils import send_admin_group
+
+logger = logging.getLogger(__name__)
+
+
+class LoopWatchdog:
+    # A coroutine beats regularly on the event loop while a thread watches the heartbeat.
+    # When the loop is blocked for too long, the thread captures the stack of the loop thread
+    # (the loop itself cannot run any code while it is blocked) and the task that was running.
+    # The report is sent to the admin group once the loop recovers.
+
+    def __init__(
+        self,
+        threshold: float = LOOP_LAG_THRESHOLD_SECONDS,
+        report_interval: float = LOOP_LAG_REPORT_INTERVAL_SECONDS,
+        beat_interval: float = 0.25
+    ) -> None:
+        self.threshold = threshold
+        self.report_interval = report_interval
+        self.beat_interval = beat_interval
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread_id: Optional[int] = None
+        self.last_beat = time.monotonic()
+        self.stall: Optional[str] = None  # Captured by watcher thread, consumed by heartbeat
+        self.last_report_time = 0.0
+        self.suppressed_reports = 0
+
+        self.stopped = threading.Event()
+        self.heartbeat_task: Optional["asyncio.Task[None]"] = None
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.heartbeat_task = asyncio.create_task(self.heartbeat())
+        self.thread = threading.Thread(target=self.watch, name="loop-watchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.heartbeat_task:
+            self.heartbeat_task.cancel()
+
+    async def heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            t = loop.time()
+            await asyncio.sleep(self.beat_interval)
+            lag = max(loop.time() - t - self.beat_interval, 0)
+            EVENT_LOOP_LAG.observe(lag)
+            self.last_beat = time.monotonic()
+
+            if self.stall is not None:
+                stall, self.stall = self.stall, None
+                self.handle_stall(lag, stall)
+
+    def watch(self) -> None:
+        while not self.stopped.wait(0.05):
+            blocked_for = time.monotonic() - self.last_beat - self.beat_interval
+            if blocked_for > self.threshold and self.stall is None:
+                self.stall = self.capture()
+
+    def capture(self) -> str:
+        frame = sys._current_frames().get(self.loop_thread_id)  # type: ignore[arg-type]
+        stack = "".join(traceback.format_stack(frame)) if frame else "Stack unavailable\n"
+        task = asyncio.current_task(self.loop)
+        if task is None:
+            source = "Callback outside of tasks"
+        else:
+            coro = task.get_coro()
+            source = f"Task {task.get_name()} running {getattr(coro, '__qualname__', repr(coro))}"
+        return f"{source}\n{stack}"
+
+    def handle_stall(self, lag: float, stall: str) -> None:
+        logger.warning(f"Event loop blocked for {lag:.3f}s by {stall}")
+
+        now = time.monotonic()
+        if now - self.last_report_time < self.report_interval:
+            self.suppressed_reports += 1
+            return
+        self.last_report_time = now
+
+        text = f"Event loop blocked for <b>{lag:.3f}s</b>"
+        if self.suppressed_reports:
+            text += f" ({self.suppressed_reports} more stalls since last report)"
+            self.suppressed_reports = 0
+        # Keep innermost frames which are the most relevant, within message length limit
+        text += f"\n<pre>{html.quote(stall[-3500:])}</pre>"
+        asyncio.create_task(self.send_report(text))
+
+    async def send_report(self, text: str) -> None:
+        try:
+            await send_admin_group(text, parse_mode=ParseMode.HTML)
+        except Exception:
+            logger.exception("Failed to report event loop stall")
@@ -0,0 +1,167 @@
+import asyncio
+import bz2
+import gzip
+import hashlib
+import logging
+import lzma
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import IO, Any, AsyncIterator, Callable, Optional
+
+from on9wordchainbot.constants import DICTIONARIES, WORDLIST_CACHE_DIR
+from on9wordchainbot.resources import get_pool, get_session
+from on9wordchainbot.words import normalize_word
+
+logger = logging.getLogger(__name__)
+
+# Compressed local files are detected by file extension
+OPENERS: dict[str, Callable[..., IO[str]]] = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+READ_CHUNK_BYTES = 1 << 20
+
+
+def open_text(path: str) -> IO[str]:
+    opener = OPENERS.get(os.path.splitext(path)[1], open)
+    return opener(path, "rt", encoding="utf-8")
+
+
+async def read_lines(path: str) -> AsyncIterator[str]:
+    # Read (and decompress) in chunks in a thread to avoid blocking the event loop
+    f = await asyncio.to_thread(open_text, path)
+    try:
+        while lines := await asyncio.to_thread(f.readlines, READ_CHUNK_BYTES):
+            for line in lines:
+                yield line
+    finally:
+        f.close()
+
+
+class WordSource(ABC):
+    # Lines of a word list from somewhere.
+    # Cached sources save the words of each successful fetch to a local file,
+    # which is used instead when a later fetch fails.
+
+    cached = True
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    @abstractmethod
+    def lines(self) -> AsyncIterator[str]:
+        pass
+
+    @property
+    def cache_path(self) -> str:
+        return os.path.join(WORDLIST_CACHE_DIR, self.name + ".txt")
+
+    async def fetch(self) -> list[str]:
+        # Normalized words of the source
+        words: list[str] = []
+        try:
+            await collect_words(self.lines(), words)
+        except Exception as e:
+            if not self.cached or not os.path.exists(self.cache_path):
+                raise
+            logger.warning(f"Failed to fetch words from {self.name} ({e.__class__.__name__}: {e}); using cached copy")
+            words.clear()  # Drop words of the failed fetch
+            await collect_words(read_lines(self.cache_path), words)
+            return words
+
+        if self.cached:
+            try:
+                await asyncio.to_thread(self.save_cache, words)
+            except OSError as e:
+                logger.warning(f"Failed to cache words from {self.name} ({e.__class__.__name__}: {e})")
+        return words
+
+    def save_cache(self, words: list[str]) -> None:
+        # Sources can be shared by dictionaries fetched at the same time, so each fetch writes its own temporary file.
+        # The last good copy is kept until it is replaced by a complete one.
+        os.makedirs(WORDLIST_CACHE_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=WORDLIST_CACHE_DIR, prefix=self.name + ".", suffix=".tmp", delete=False
+        ) as f:
+            try:
+                f.writelines(w + "\n" for w in words)
+            except BaseException:
+                f.close()
+                os.remove(f.name)
+                raise
+        os.replace(f.name, self.cache_path)
+
+
+class URLSource(WordSource):
+    def __init__(self, url: str, name: Optional[str] = None) -> None:
+        super().__init__(name or "url-" + hashlib.sha1(url.encode()).hexdigest()[:8])
+        self.url = url
+
+    async def lines(self) -> AsyncIterator[str]:
+        session = get_session()
+        async with session.get(self.url, raise_for_status=True) as resp:
+            encoding = resp.charset or "utf-8"  # get_encoding() needs the whole body
+            async for line in resp.content:
+                yield line.decode(encoding)
+
+
+class FileSource(WordSource):
+    # Already local, so not cached
+    cached = False
+
+    def __init__(self, path: str, name: Optional[str] = None) -> None:
+        # Hash of the path so that files with the same name in different directories get different names
+        path_hash = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:8]
+        super().__init__(name or f"file-{os.path.basename(path)}-{path_hash}")
+        self.path = path
+
+    def lines(self) -> AsyncIterator[str]:
+        return read_lines(self.path)
+
+
+class DatabaseSource(WordSource):
+    # Accepted words of the wordlist table
+    def __init__(self, name: Optional[str] = None) -> None:
+        super().__init__(name or "db-wordlist")
+
+    async def lines(self) -> AsyncIterator[str]:
+        pool = get_pool()
+        async with pool.acquire() as conn, conn.transaction():  # Cursors require a transaction
+            async for row in conn.cursor("SELECT word from wordlist WHERE accepted;", prefetch=1000):
+                yield row[0]
+
+
+async def collect_words(lines: AsyncIterator[str], words: list[str]) -> None:
+    # Lines are normalized one at a time, so only one str object per word is kept
+    async for line in lines:
+        word = normalize_word(line)
+        if word:
+            words.append(word)
+
+
+def source_from_config(source_config: dict[str, Any]) -> WordSource:
+    source_type = source_config["type"]
+    name = source_config.get("name")
+    if source_type == "url":
+        return URLSource(source_config["url"], name)
+    if source_type == "file":
+        return FileSource(source_config["path"], name)
+    if source_type == "db":
+        return DatabaseSource(name)
+    raise ValueError(f"Unknown word list source type: {source_type}")
+
+
+def get_sources(dictionary_name: str) -> list[WordSource]:
+    return [source_from_config(c) for c in DICTIONARIES[dictionary_name]]
+
+
+async def fetch_words(sources: list[WordSource]) -> list[str]:
+    # Sources are fetched in parallel. Words may repeat across sources.
+    # A source failing without a cached copy fails the fetch so that the dictionary is not missing words,
+    # and the task group cancels the fetches of the other sources.
+    async with asyncio.TaskGroup() as tg:
+        tasks = [tg.create_task(s.fetch()) for s in sources]
+    words: list[str] = []
+    for task in tasks:
+        word_list = task.result()
+        words.extend(word_list)
+        word_list.clear()
+    return words
@@ -1,44 +1,561 @@
 import asyncio
 import logging
+import re
+import time
+import weakref
+from array import array
+from bisect import bisect_left
+from functools import reduce
+from itertools import accumulate, count, pairwise
+from operator import and_
+from string import ascii_lowercase
+from typing import Iterable, Iterator, Optional, Sequence
 
-from dawg import CompletionDAWG
+from dawg import IntCompletionDAWG
 
-from on9wordchainbot.constants import WORDLIST_SOURCE
-from on9wordchainbot.resources import get_pool, get_session
+from on9wordchainbot.constants import DEFAULT_DICTIONARY, DICTIONARIES, DICTIONARY_IDLE_SECONDS, GameSettings
+from on9wordchainbot.metrics import WORDS_UPDATE_SECONDS
 
 logger = logging.getLogger(__name__)
 
+try:
+    import numpy as np
+except ImportError:
+    HAS_NUMPY = False
+    logger.warning("numpy unavailable; filtering words in pure Python. To install, use `pip install numpy`.")
+else:
+    HAS_NUMPY = True
 
-class Words:
-    # Directed acyclic word graph (DAWG)
-    dawg: CompletionDAWG
-    count: int
+LETTER_BITS = {c: 1 << i for i, c in enumerate(ascii_lowercase)}
+ANY_LETTER = len(ascii_lowercase)  # Index of "any letter" rows in Dictionary.letter_counts
+
+
+def letter_mask(letters: Iterable[str]) -> int:
+    # Bit i is set if the i-th letter of the alphabet is present, other characters are ignored
+    return sum(LETTER_BITS.get(c, 0) for c in set(letters))
+
+
+def normalize_word(line: str) -> Optional[str]:
+    # Lowercase word from a line of a word list, None if it is not a word.
+    # Returns the line itself if already normalized, so that normalizing again does not copy words.
+    word = line.strip()
+    if not word.isalpha():
+        return None
+    return word if word.islower() else word.lower()
+
+
+def get_answer_pattern(alphabet: str) -> re.Pattern[str]:
+    # Messages which may be answers, i.e. consisting of letters of the alphabet in any case
+    if not alphabet:
+        return re.compile(r"(?!)")  # Matches nothing
+    return re.compile(f"^[{re.escape(alphabet)}]{{1,100}}$", re.IGNORECASE)
+
+
+def edits(word: str, alphabet: str) -> set[str]:
+    # Strings one deletion, substitution, insertion or swap of adjacent letters away from word
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    return {
+        *(a + b[1:] for a, b in splits if b),
+        *(a + c + b[1:] for a, b in splits if b for c in alphabet if c != b[0]),
+        *(a + c + b for a, b in splits for c in alphabet),
+        *(a + b[1] + b[0] + b[2:] for a, b in splits if len(b) > 1 and b[0] != b[1])
+    }
+
+
+def word_matches(
+    word: str, min_len: int = 1, required_letter: Optional[str] = None, banned_letters: Optional[list[str]] = None
+) -> bool:
+    return (
+        len(word) >= min_len and (not required_letter or required_letter in word)
+        and all(c not in word for c in banned_letters or ())
+    )
+
+
+class WordList:
+    # Sorted words joined into a single string with an array of offsets,
+    # much more compact than a list of str objects.
+    # The index of a word in the list is its word id.
+
+    __slots__ = ("text", "offsets")
+
+    ITER_CHUNK_SIZE = 4096
+
+    def __init__(self, words: list[str]) -> None:
+        # Every word is followed by a newline, joined with an empty last word to avoid copying the text to add it
+        words.append("")
+        try:
+            self.text = "\n".join(words) if len(words) > 1 else ""
+        finally:
+            words.pop()
+        self.offsets = array("I", accumulate((len(w) + 1 for w in words), initial=0))
+
+    @staticmethod
+    def from_words(words: list[str]) -> "WordList":
+        # Normalized, deduplicated and sorted words.
+        # The list is normalized, sorted and deduplicated in place, so that the only other copy of the words
+        # made is the text of the word list. Sorting then skipping repeated words avoids a set of all words.
+        n = 0
+        for w in map(normalize_word, words):
+            if w:
+                words[n] = w
+                n += 1
+        del words[n:]
+        words.sort()
+
+        n = 0
+        for w in words:
+            if not n or w != words[n - 1]:
+                words[n] = w
+                n += 1
+        del words[n:]
+        return WordList(words)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self) -> Iterator[str]:
+        # In chunks, so that only a chunk of words exist as str objects at a time
+        for start in range(0, len(self), self.ITER_CHUNK_SIZE):
+            yield from self.slice(start, min(start + self.ITER_CHUNK_SIZE, len(self)))
+
+    def lengths(self) -> Iterator[int]:
+        return (stop - start - 1 for start, stop in pairwise(self.offsets))
+
+    def __getitem__(self, i: int) -> str:
+        return self.text[self.offsets[i]:self.offsets[i + 1] - 1]
+
+    def slice(self, start: int, stop: int) -> list[str]:
+        # Words with ids in [start, stop)
+        if start >= stop:
+            return []
+        return self.text[self.offsets[start]:self.offsets[stop] - 1].split("\n")
+
+    def prefix_range(self, prefix: str) -> tuple[int, int]:
+        # Words with the same prefix have consecutive ids
+        return bisect_left(self, prefix), bisect_left(self, prefix + chr(0x10FFFF))
+
+    def first_letters(self) -> str:
+        # Letters which words start with, skipping the words of each letter with a binary search
+        letters = []
+        start = 0
+        while start < len(self):
+            letter = self[start][0]
+            letters.append(letter)
+            start = self.prefix_range(letter)[1]
+        return "".join(letters)
+
+
+class Dictionary:
+    # A word list with indexes for checking, filtering and counting words.
+    # Several named dictionaries can be loaded, each built from its own sources.
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        # Directed acyclic word graph (DAWG) mapping words to word ids
+        self.dawg = IntCompletionDAWG()
+        self.words = WordList([])
+        self.count = 0
+        # Per word id: length (capped at 255) and letter mask for filtering without string operations
+        self.lengths = array("B")
+        self.letter_masks = array("I")
+        self.alphabet = ""  # Letters used in words, for generating strings one edit away and choosing letters
+        self.first_letters = ""  # Letters which words start with
+        self.answer_pattern = get_answer_pattern(self.alphabet)
+        # Evaluate filters as NumPy boolean masks (views of the arrays above)
+        self.use_numpy = HAS_NUMPY
+        # Number of words by [first letter][required letter][min length up to GameSettings.MAX_WORD_LENGTH_LIMIT],
+        # where ANY_LETTER means no constraint on the letter
+        self.letter_counts: list[list[list[int]]] = []
+        # Word ids change when the dictionary is rebuilt, so sets of word ids in use are remapped
+        self.word_sets: "weakref.WeakSet[WordSet]" = weakref.WeakSet()
+        self.last_used = time.monotonic()
+
+    def build(self, wordlist: Iterable[str]) -> None:
+        self.replace(Dictionary.from_word_list(self.name, WordList.from_words(list(wordlist))))
 
     @staticmethod
-    async def update() -> None:
-        # Words retrieved from online repo and database table with additional approved words
-        logger.info("Retrieving words")
+    def from_word_list(name: str, words: WordList) -> "Dictionary":
+        # Other structures are built by iterating over the compact word list
+        # instead of keeping a str object for every word.
+        # Existing dictionaries are not touched, so this can run in a thread.
+        dictionary = Dictionary(name)
+        dictionary.dawg = IntCompletionDAWG(zip(words, count()), input_is_sorted=True)
+        dictionary.words = words
+        dictionary.count = len(words)
+        dictionary.lengths = array("B", (min(n, 255) for n in words.lengths()))
+        dictionary.letter_masks = array("I", map(letter_mask, words))
+        dictionary.alphabet = "".join(sorted(set(words.text) - {"\n"}))
+        dictionary.first_letters = words.first_letters()
+        dictionary.answer_pattern = get_answer_pattern(dictionary.alphabet)
+        dictionary.letter_counts = dictionary.build_letter_counts()
+        return dictionary
+
+    def replace(self, other: "Dictionary") -> None:
+        # Switch to the word list and indexes of a newly built dictionary
+        old_words = self.words
+        self.dawg = other.dawg
+        self.words = other.words
+        self.count = other.count
+        self.lengths = other.lengths
+        self.letter_masks = other.letter_masks
+        self.alphabet = other.alphabet
+        self.first_letters = other.first_letters
+        self.answer_pattern = other.answer_pattern
+        self.letter_counts = other.letter_counts
+        for word_set in self.word_sets:
+            word_set.remap(old_words)
+
+    def filter_ids(
+        self,
+        start: int,
+        stop: int,
+        min_len: int = 1,
+        required_letter: Optional[str] = None,
+        banned_letters: Optional[list[str]] = None,
+        exclude_words: Optional["WordSet"] = None
+    ) -> Sequence[int]:
+        # Ids in [start, stop) of words satisfying the constraints
+        if min_len <= 1 and not required_letter and not banned_letters and not exclude_words:
+            return range(start, stop)
+
+        letters = (required_letter or "") + "".join(banned_letters or ())
+        if not all(c in LETTER_BITS for c in letters):
+            # Letter masks only cover a-z
+            return self.filter_ids_by_strings(start, stop, min_len, required_letter, banned_letters, exclude_words)
+
+        required_mask = letter_mask(required_letter or "")
+        banned_mask = letter_mask(banned_letters or ())
+        excluded = exclude_words.ids_in_range(start, stop) if exclude_words else array("I")
+
+        if self.use_numpy:
+            keep = self.filter_mask(start, stop, min_len, required_mask, banned_mask, excluded)
+            return (np.flatnonzero(keep) + start).tolist()
+
+        # Pure Python fallback, applying filters one at a time so that later filters check fewer ids
+        ids: Sequence[int] = range(start, stop)
+        if excluded:
+            # Remove excluded ids by position while ids are still consecutive
+            ids = list(ids)
+            for i in reversed(excluded):
+                del ids[i - start]
+        if min_len > 1:
+            lengths = self.lengths
+            ids = [i for i in ids if lengths[i] >= min_len]
+        masks = self.letter_masks
+        if required_mask:
+            ids = [i for i in ids if masks[i] & required_mask]
+        if banned_mask:
+            ids = [i for i in ids if not masks[i] & banned_mask]
+        return ids
+
+    def filter_mask(
+        self, start: int, stop: int, min_len: int, required_mask: int, banned_mask: int, excluded: "array[int]"
+    ) -> "np.ndarray":
+        # NumPy boolean mask over ids in [start, stop)
+        keep = np.ones(stop - start, dtype=bool)
+        if min_len > 1:
+            keep &= np.frombuffer(self.lengths, dtype=np.uint8)[start:stop] >= min_len
+        if required_mask or banned_mask:
+            masks = np.frombuffer(self.letter_masks, dtype=np.uint32)[start:stop]
+            if required_mask:
+                keep &= (masks & required_mask) != 0
+            if banned_mask:
+                keep &= (masks & banned_mask) == 0
+        if excluded:
+            keep[np.frombuffer(excluded, dtype=np.uint32) - start] = False
+        return keep
+
+    def filter_ids_by_strings(
+        self,
+        start: int,
+        stop: int,
+        min_len: int = 1,
+        required_letter: Optional[str] = None,
+        banned_letters: Optional[list[str]] = None,
+        exclude_words: Optional["WordSet"] = None
+    ) -> list[int]:
+        excluded = set(exclude_words.ids_in_range(start, stop)) if exclude_words else set()
+        return [
+            i for i, w in enumerate(self.words.slice(start, stop), start=start)
+            if word_matches(w, min_len, required_letter, banned_letters) and i not in excluded
+        ]
+
+    def build_letter_counts(self) -> list[list[list[int]]]:
+        max_len = GameSettings.MAX_WORD_LENGTH_LIMIT
+        if HAS_NUMPY:
+            lengths = np.minimum(np.frombuffer(self.lengths, dtype=np.uint8), max_len)
+            masks = np.frombuffer(self.letter_masks, dtype=np.uint32)
+            table = np.zeros((ANY_LETTER + 1, ANY_LETTER + 1, max_len + 1), dtype=np.int64)
+            for first in range(ANY_LETTER + 1):
+                if first < ANY_LETTER:
+                    start, stop = self.words.prefix_range(ascii_lowercase[first])
+                else:
+                    start, stop = 0, self.count
+                for required in range(ANY_LETTER + 1):
+                    selected = lengths[start:stop]
+                    if required < ANY_LETTER:
+                        selected = selected[(masks[start:stop] & (1 << required)) != 0]
+                    table[first, required] = np.bincount(selected, minlength=max_len + 1)
+            # Counts of words with at least each length
+            return table[:, :, ::-1].cumsum(axis=2)[:, :, ::-1].tolist()
+
+        counts = [[[0] * (max_len + 1) for _ in range(ANY_LETTER + 1)] for _ in range(ANY_LETTER + 1)]
+        for w in self.words:
+            length = min(len(w), max_len)
+            first_rows = [counts[ANY_LETTER]]
+            if w[0] in LETTER_BITS:
+                first_rows.append(counts[ord(w[0]) - ord("a")])
+            letters = [ord(c) - ord("a") for c in set(w) if c in LETTER_BITS]
+            for row in first_rows:
+                row[ANY_LETTER][length] += 1
+                for required in letters:
+                    row[required][length] += 1
+        for row in counts:
+            for by_length in row:
+                for i in range(max_len - 1, -1, -1):
+                    by_length[i] += by_length[i + 1]
+        return counts
+
+    def count_words(
+        self,
+        prefix: Optional[str] = None,
+        min_len: int = 1,
+        required_letter: Optional[str] = None,
+        banned_letters: Optional[list[str]] = None,
+        exclude_words: Optional["WordSet"] = None
+    ) -> int:
+        # Number of words satisfying the constraints
+        start, stop = self.words.prefix_range(prefix) if prefix else (0, self.count)
+        letters = (required_letter or "") + "".join(banned_letters or ())
+        if (
+            not banned_letters
+            and min_len <= GameSettings.MAX_WORD_LENGTH_LIMIT
+            and (not prefix or prefix in LETTER_BITS)
+            and (not required_letter or required_letter in LETTER_BITS)
+        ):
+            first = ord(prefix) - ord("a") if prefix else ANY_LETTER
+            required = ord(required_letter) - ord("a") if required_letter else ANY_LETTER
+            count = self.letter_counts[first][required][max(min_len, 0)]
+        elif self.use_numpy and all(c in LETTER_BITS for c in letters):
+            required_mask = letter_mask(required_letter or "")
+            banned_mask = letter_mask(banned_letters or ())
+            keep = self.filter_mask(start, stop, min_len, required_mask, banned_mask, array("I"))
+            count = int(np.count_nonzero(keep))
+        else:
+            count = len(self.filter_ids(start, stop, min_len, required_letter, banned_letters))
+
+        if exclude_words:
+            # Excluded words are few, so check them one by one
+            count -= sum(
+                word_matches(self.words[i], min_len, required_letter, banned_letters)
+                for i in exclude_words.ids_in_range(start, stop)
+            )
+        return count
+
+    def has_words(
+        self,
+        prefix: Optional[str] = None,
+        min_len: int = 1,
+        required_letter: Optional[str] = None,
+        banned_letters: Optional[list[str]] = None
+    ) -> bool:
+        # Whether any word satisfies the constraints
+        letters = (required_letter or "") + "".join(banned_letters or ())
+        if all(c in LETTER_BITS for c in letters):
+            return self.count_words(prefix, min_len, required_letter, banned_letters) > 0
+
+        # Letters not covered by letter masks, stop at the first matching word instead of counting
+        start, stop = self.words.prefix_range(prefix) if prefix else (0, self.count)
+        for chunk_start in range(start, stop, WordList.ITER_CHUNK_SIZE):
+            chunk = self.words.slice(chunk_start, min(chunk_start + WordList.ITER_CHUNK_SIZE, stop))
+            if any(word_matches(w, min_len, required_letter, banned_letters) for w in chunk):
+                return True
+        return False
+
+    def common_letters(self, prefix: str, min_len: int = 1, banned_letters: Optional[list[str]] = None) -> set[str]:
+        # Letters (a-z only) included in every word with the prefix, at least min_len letters and no banned letters,
+        # none if there are no such words
+        start, stop = self.words.prefix_range(prefix)
+        if self.use_numpy and all(c in LETTER_BITS for c in banned_letters or ()):
+            keep = self.filter_mask(start, stop, min_len, 0, letter_mask(banned_letters or ()), array("I"))
+            masks = np.frombuffer(self.letter_masks, dtype=np.uint32)[start:stop][keep]
+            common = int(np.bitwise_and.reduce(masks)) if len(masks) else 0
+        else:
+            ids = self.filter_ids(start, stop, min_len, banned_letters=banned_letters)
+            common = reduce(and_, map(self.letter_masks.__getitem__, ids)) if ids else 0
+        return {c for c, bit in LETTER_BITS.items() if common & bit}
+
+    def contained_letters(self, prefix: str, min_len: int = 1) -> set[str]:
+        # Letters included in any word with the prefix and at least min_len letters
+        if (
+            min_len <= GameSettings.MAX_WORD_LENGTH_LIMIT
+            and prefix in LETTER_BITS
+            and all(c in LETTER_BITS for c in self.alphabet)
+        ):
+            by_letter = self.letter_counts[ord(prefix) - ord("a")]
+            return {c for i, c in enumerate(ascii_lowercase) if by_letter[i][max(min_len, 0)]}
+
+        # Letters not covered by the precomputed counts, found in a single pass
+        start, stop = self.words.prefix_range(prefix)
+        return set().union(*(w for w in self.words.slice(start, stop) if len(w) >= min_len))
+
+    def split_words(self, words: Iterable[str]) -> tuple[list[str], list[str]]:
+        # Distinct words in and not in the dictionary, in the order given
+        present: list[str] = []
+        absent: list[str] = []
+        dawg = self.dawg
+        for w in dict.fromkeys(words):
+            (present if w in dawg else absent).append(w)
+        return present, absent
+
+    def suggest(self, word: str, max_distance: int = 2, limit: int = 3, time_budget: float = 0.01) -> list[str]:
+        # Other words within edit distance max_distance of word, closest first.
+        # Words one edit away are few enough to generate and look up. Farther words are searched for
+        # until the time budget (in seconds) runs out, returning the words found so far.
+        deadline = time.perf_counter() + time_budget
+        suggestions = sorted(w for w in edits(word, self.alphabet) if w in self.dawg)
+        if len(suggestions) < limit and max_distance > 1:
+            found = set(suggestions)
+            suggestions.extend(sorted(w for w in self.search_distance(word, max_distance, deadline) if w not in found))
+        return suggestions[:limit]
+
+    def search_distance(self, word: str, max_distance: int, deadline: float) -> list[str]:
+        # Other words within Levenshtein distance max_distance of word.
+        # Words sharing a prefix have consecutive ids, so the sorted word list is searched as a trie depth first,
+        # computing one row of the edit distance table per prefix and skipping prefixes already too far from word.
+        # Closer prefixes are searched first, as they are more likely to lead to words before the deadline.
+        words = self.words
+        too_far = max_distance + 1
+        found: list[str] = []
+        # (prefix, distances from word[:i] to prefix, range of word ids starting with prefix)
+        stack = [("", list(range(len(word) + 1)), 0, self.count)]
+        while stack and time.perf_counter() < deadline:
+            prefix, row, start, stop = stack.pop()
+            depth = len(prefix)
+            if start < stop and words[start] == prefix:  # Sorted before longer words with the prefix
+                if 0 < row[-1] <= max_distance:
+                    found.append(prefix)
+                start += 1
+
+            children = []
+            while start < stop:
+                child = prefix + words[start][depth]
+                child_stop = bisect_left(words, child + chr(0x10FFFF), start, stop)
+                # Cells farther than max_distance from the diagonal always exceed it, so only the band is computed
+                letter = child[-1]
+                child_row = [row[0] + 1] + [too_far] * len(word)
+                for i in range(max(depth + 1 - max_distance, 1), min(depth + 2 + max_distance, len(word) + 1)):
+                    child_row[i] = min(child_row[i - 1] + 1, row[i] + 1, row[i - 1] + (word[i - 1] != letter))
+                if (closest := min(child_row)) <= max_distance:
+                    children.append((closest, (child, child_row, start, child_stop)))
+                start = child_stop
+            children.sort(key=lambda t: t[0], reverse=True)  # Closest on top of the stack
+            stack.extend(t[1] for t in children)
+        return found
+
+    async def update(self) -> None:
+        # Prevent circular imports
+        from on9wordchainbot.word_sources import fetch_words, get_sources
+
+        # Words retrieved from the sources configured for the dictionary,
+        # by default the online repo and database table with additional approved words
+        logger.info(f"Retrieving words of dictionary {self.name}")
+        t = time.perf_counter()
+
+        # Lines are streamed and normalized one at a time instead of loading whole sources first
+        words = await fetch_words(get_sources(self.name))
+
+        def build() -> Dictionary:
+            word_list = WordList.from_words(words)  # In place
+            words.clear()  # Free the words before building the other structures
+            return Dictionary.from_word_list(self.name, word_list)
+
+        logger.info(f"Processing words of dictionary {self.name}")
+        # Built in a thread so that games keep running, then switched to on the event loop thread
+        self.replace(await asyncio.to_thread(build))
+
+        WORDS_UPDATE_SECONDS.observe(time.perf_counter() - t)
+        logger.info(f"DAWG of dictionary {self.name} updated")
+
+
+class WordSet:
+    # Set of dictionary words stored as a sorted array of word ids (4 bytes per word).
+    # Words not in the dictionary are ignored since they can never be valid answers.
+
+    __slots__ = ("dictionary", "ids", "__weakref__")
+
+    def __init__(self, dictionary: Dictionary, words: Iterable[str] = ()) -> None:
+        self.dictionary = dictionary
+        self.ids = array("I")
+        dictionary.word_sets.add(self)
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, word: str) -> bool:
+        word_id = self.dictionary.dawg.get(word)
+        if word_id is None:
+            return False
+        i = bisect_left(self.ids, word_id)
+        return i < len(self.ids) and self.ids[i] == word_id
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.dictionary.words[i] for i in self.ids)
+
+    def add(self, word: str) -> None:
+        word_id = self.dictionary.dawg.get(word)
+        if word_id is None:
+            return
+        i = bisect_left(self.ids, word_id)
+        if i == len(self.ids) or self.ids[i] != word_id:
+            self.ids.insert(i, word_id)
+
+    def ids_in_range(self, start: int, stop: int) -> "array[int]":
+        return self.ids[bisect_left(self.ids, start):bisect_left(self.ids, stop)]
+
+    def remap(self, old_words: WordList) -> None:
+        word_ids = (self.dictionary.dawg.get(old_words[i]) for i in self.ids)
+        self.ids = array("I", sorted(i for i in word_ids if i is not None))
+
 
-        async def get_words_from_source() -> list[str]:
-            session = get_session()
-            async with session.get(WORDLIST_SOURCE) as resp:
-                text = await resp.text()
-                return text.splitlines()
+# Loaded dictionaries by name. The default dictionary is always loaded,
+# others are loaded on first use and dropped after being idle.
+default_dictionary = Dictionary(DEFAULT_DICTIONARY)
+dictionaries: dict[str, Dictionary] = {DEFAULT_DICTIONARY: default_dictionary}
+dictionary_load_lock = asyncio.Lock()
 
-        async def get_words_from_db() -> list[str]:
-            pool = get_pool()
-            async with pool.acquire() as conn:
-                res = await conn.fetch("SELECT word from wordlist WHERE accepted;")
-                return [row[0] for row in res]
 
-        source_task = asyncio.create_task(get_words_from_source())
-        db_task = asyncio.create_task(get_words_from_db())
-        wordlist = await source_task + await db_task
+async def get_dictionary(name: str) -> Dictionary:
+    dictionary = dictionaries.get(name)
+    if dictionary is None:
+        if name not in DICTIONARIES:
+            raise ValueError(f"Unknown dictionary: {name}")
+        async with dictionary_load_lock:  # Avoid loading the same dictionary twice
+            dictionary = dictionaries.get(name)
+            if dictionary is None:
+                dictionary = Dictionary(name)
+                await dictionary.update()
+                dictionaries[name] = dictionary
+    dictionary.last_used = time.monotonic()
+    return dictionary
 
-        logger.info("Processing words")
 
-        wordlist = [w.lower() for w in wordlist if w.isalpha()]
-        Words.dawg = CompletionDAWG(wordlist)
-        Words.count = len(Words.dawg.keys())
+async def update_dictionaries() -> None:
+    # Drop idle dictionaries, a dictionary is in use while any game holds a word set of it
+    now = time.monotonic()
+    for name, dictionary in list(dictionaries.items()):
+        if (
+            dictionary is not default_dictionary
+            and not dictionary.word_sets
+            and now - dictionary.last_used > DICTIONARY_IDLE_SECONDS
+        ):
+            del dictionaries[name]
+            logger.info(f"Dictionary {name} unloaded")
 
-        logger.info("DAWG updated")
+    for dictionary in list(dictionaries.values()):
+        try:
+            await dictionary.update()
+        except Exception:  # Keep the current words and update other dictionaries
+            logger.exception(f"Failed to update dictionary {dictionary.name}")